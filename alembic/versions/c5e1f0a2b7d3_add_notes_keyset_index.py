@@ -0,0 +1,35 @@
+"""add notes keyset pagination index
+
+Revision ID: c5e1f0a2b7d3
+Revises: b3c7a1d9e2f4
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e1f0a2b7d3"
+down_revision: str | Sequence[str] | None = "b3c7a1d9e2f4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Replace the user_id index with a (user_id, created_at DESC, id DESC) index."""
+    op.create_index(
+        "ix_notes_user_id_created_at_id",
+        "notes",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.drop_index(op.f("ix_notes_user_id"), table_name="notes")
+
+
+def downgrade() -> None:
+    """Restore the plain user_id index."""
+    op.create_index(op.f("ix_notes_user_id"), "notes", ["user_id"])
+    op.drop_index("ix_notes_user_id_created_at_id", table_name="notes")
@@ -0,0 +1,96 @@
+"""partition refresh_tokens by expires_at
+
+Revision ID: d8a4b6c1e9f2
+Revises: c5e1f0a2b7d3
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a4b6c1e9f2"
+down_revision: str | Sequence[str] | None = "c5e1f0a2b7d3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Refresh token lifetime (7 days) plus four weeks of look-ahead; later weeks are
+# created by the app's partition maintenance (app/auth/token_partitions.py).
+INITIAL_WEEKS = 6
+
+COLUMNS = "id, user_id, token_family, is_revoked, expires_at, created_at"
+
+
+def _create_table(**kwargs) -> None:
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("token_family", sa.String(), nullable=False),
+        sa.Column("is_revoked", sa.Boolean(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        **kwargs,
+    )
+    op.create_index(op.f("ix_refresh_tokens_user_id"), "refresh_tokens", ["user_id"])
+    op.create_index(op.f("ix_refresh_tokens_token_family"), "refresh_tokens", ["token_family"])
+
+
+def _retire_old_table() -> None:
+    op.rename_table("refresh_tokens", "refresh_tokens_old")
+    op.drop_index(op.f("ix_refresh_tokens_token_family"), table_name="refresh_tokens_old")
+    op.drop_index(op.f("ix_refresh_tokens_user_id"), table_name="refresh_tokens_old")
+    op.execute(
+        "ALTER TABLE refresh_tokens_old RENAME CONSTRAINT refresh_tokens_pkey TO refresh_tokens_old_pkey"
+    )
+
+
+def upgrade() -> None:
+    """Recreate refresh_tokens range-partitioned by expires_at into weekly partitions.
+
+    Only unexpired tokens are copied across; expired ones would be dropped by
+    the first retention run anyway. Indexes on the parent are created on every
+    partition automatically.
+    """
+    _retire_old_table()
+    _create_table(
+        sa.PrimaryKeyConstraint("id", "expires_at"),
+        postgresql_partition_by="RANGE (expires_at)",
+    )
+
+    op.execute("CREATE TABLE refresh_tokens_default PARTITION OF refresh_tokens DEFAULT")
+    today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=today.weekday())
+    for _ in range(INITIAL_WEEKS):
+        end = start + timedelta(weeks=1)
+        op.execute(
+            f"CREATE TABLE refresh_tokens_p{start:%Y%m%d} PARTITION OF refresh_tokens "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.execute(
+        f"INSERT INTO refresh_tokens ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM refresh_tokens_old WHERE expires_at >= now()"
+    )
+    op.drop_table("refresh_tokens_old")
+
+
+def downgrade() -> None:
+    """Restore a plain refresh_tokens table keyed by id."""
+    _retire_old_table()
+    _create_table(sa.PrimaryKeyConstraint("id"))
+    op.execute(f"INSERT INTO refresh_tokens ({COLUMNS}) SELECT {COLUMNS} FROM refresh_tokens_old")
+    # Drops every partition along with the partitioned parent.
+    op.drop_table("refresh_tokens_old")
@@ -0,0 +1,31 @@
+"""add refresh token replaced_at
+
+Revision ID: e2b9c4d7a1f6
+Revises: d8a4b6c1e9f2
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b9c4d7a1f6"
+down_revision: str | Sequence[str] | None = "d8a4b6c1e9f2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add replaced_at (set on rotation) to refresh_tokens and its partitions."""
+    op.add_column(
+        "refresh_tokens", sa.Column("replaced_at", sa.DateTime(timezone=True), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Remove replaced_at from refresh_tokens."""
+    op.drop_column("refresh_tokens", "replaced_at")
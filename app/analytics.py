@@ -1,9 +1,24 @@
-"""Analytics event abstraction with a pluggable backend."""
+"""Analytics event abstraction with a pluggable backend.
+
+``LogAnalyticsBackend`` writes each event to structlog as it happens.
+``BatchingAnalyticsBackend`` only buffers events in ``track``/``identify``;
+a background task hands them to an ``AnalyticsSink`` (a vendor API client,
+or ``NDJSONFileSink`` locally) in batches, so request handlers never wait
+on delivery.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import json
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from datetime import UTC, datetime
+from pathlib import Path
 from typing import Any, Protocol
 
+from app.config import Settings, settings
 from app.logging import get_logger
 
 logger = get_logger("app.analytics")
@@ -44,8 +59,179 @@ class LogAnalyticsBackend:
         logger.info("analytics.identify", user_id=user_id, traits=traits or {})
 
 
+class AnalyticsSink(Protocol):
+    """Destination that receives buffered events in batches."""
+
+    async def send(self, events: list[dict[str, Any]]) -> None: ...
+
+
+class NDJSONFileSink:
+    """Sink that appends each event as one JSON line to a local file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+
+    async def send(self, events: list[dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: str) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class BatchingAnalyticsBackend:
+    """Backend that buffers events and flushes them to a sink in the background.
+
+    ``track`` and ``identify`` only append to a bounded buffer; once it holds
+    ``max_buffer`` events, new ones are dropped and counted. A task started
+    by ``start()`` sends batches of up to ``batch_size`` events whenever a
+    full batch is waiting or ``flush_interval`` seconds have passed.
+    ``stop()`` sends whatever is still buffered. A batch the sink fails on
+    is logged and counted, not retried.
+    """
+
+    def __init__(
+        self,
+        sink: AnalyticsSink,
+        *,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10_000,
+    ) -> None:
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def track(
+        self,
+        event: str,
+        *,
+        properties: dict[str, Any] | None = None,
+        user_id: str | None = None,
+    ) -> None:
+        self._enqueue(
+            {"type": "track", "event": event, "properties": properties or {}, "user_id": user_id}
+        )
+
+    def identify(self, user_id: str, *, traits: dict[str, Any] | None = None) -> None:
+        self._enqueue({"type": "identify", "user_id": user_id, "traits": traits or {}})
+
+    def _enqueue(self, event: dict[str, Any]) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        event["timestamp"] = datetime.now(UTC).isoformat()
+        self._buffer.append(event)
+        if len(self._buffer) == self.batch_size:
+            self._notify()
+
+    def _notify(self) -> None:
+        if self._loop is None or self._wake is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wake.set()
+        else:
+            # Called from a worker thread (sync dependency or endpoint).
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self) -> None:
+        """Start the flush task on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="analytics_flush")
+
+    async def stop(self) -> None:
+        """Stop the flush task and send every buffered event."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+            self._loop = self._wake = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send buffered events in batches of at most ``batch_size``."""
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                await self.sink.send(batch)
+            except asyncio.CancelledError:
+                # Stopped mid-send: keep the batch so stop() delivers it.
+                self._buffer.extendleft(reversed(batch))
+                raise
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("analytics.flush_failed", events=len(batch))
+            else:
+                self.sent += len(batch)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "buffered": len(self._buffer),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+def _default_backend(app_settings: Settings) -> AnalyticsBackend:
+    if app_settings.analytics_ndjson_path:
+        return BatchingAnalyticsBackend(
+            NDJSONFileSink(app_settings.analytics_ndjson_path),
+            batch_size=app_settings.analytics_batch_size,
+            flush_interval=app_settings.analytics_flush_interval_seconds,
+            max_buffer=app_settings.analytics_buffer_size,
+        )
+    return LogAnalyticsBackend()
+
+
 # Module-level instance — swap with any AnalyticsBackend-compatible object.
-analytics: AnalyticsBackend = LogAnalyticsBackend()
+analytics: AnalyticsBackend = _default_backend(settings)
+
+
+@asynccontextmanager
+async def analytics_lifespan(app_settings: Settings | None = None) -> AsyncIterator[None]:
+    """Run the current backend's flush task, if it has one, for the app's lifetime.
+
+    An app built with its own *app_settings* (not the process-wide settings)
+    first replaces the backend with the default one for those settings.
+    """
+    global analytics
+    if app_settings is not None and app_settings is not settings:
+        analytics = _default_backend(app_settings)
+    backend = analytics
+    if not isinstance(backend, BatchingAnalyticsBackend):
+        yield
+        return
+    backend.start()
+    try:
+        yield
+    finally:
+        await backend.stop()
 
 
 def get_analytics() -> AnalyticsBackend:
@@ -1,10 +1,13 @@
+from app.auth.principal import Principal, current_principal
 from app.auth.roles import UserRole, require_role
 from app.auth.users import auth_backend, current_active_user, fastapi_users
 
 __all__ = [
+    "Principal",
     "UserRole",
     "auth_backend",
     "current_active_user",
+    "current_principal",
     "fastapi_users",
     "require_role",
 ]
@@ -1,6 +1,14 @@
+from typing import Any
+from uuid import UUID
+
+import jwt
+from fastapi import Depends
 from fastapi_users.authentication import AuthenticationBackend, CookieTransport, JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
 
-from app.config import settings
+from app.config import Settings, settings
+from app.deps import get_settings
+from app.models.user import User
 
 ACCESS_TOKEN_LIFETIME = 900  # 15 minutes
 
@@ -15,10 +23,48 @@ cookie_transport = CookieTransport(
 )
 
 
-def get_jwt_strategy() -> JWTStrategy:
+class ClaimsJWTStrategy(JWTStrategy[User, UUID]):
+    """JWT strategy that also signs the user's role and status into the token.
+
+    The claims are trusted until the token expires, so a role change or
+    deactivation takes effect within ``ACCESS_TOKEN_LIFETIME``.
+    """
+
+    async def write_token(self, user: User) -> str:
+        data = {
+            "sub": str(user.id),
+            "aud": self.token_audience,
+            "role": user.role,
+            "is_active": user.is_active,
+            "is_superuser": user.is_superuser,
+        }
+        return generate_jwt(data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm)
+
+    def read_claims(self, token: str) -> dict[str, Any] | None:
+        """Return the verified claims of *token*, or None if it is invalid or lacks them."""
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+        except jwt.PyJWTError:
+            return None
+        if not {"sub", "role", "is_active", "is_superuser"} <= data.keys():
+            return None
+        return data
+
+
+def jwt_strategy(claims: bool) -> JWTStrategy:
+    """Access-token strategy, signing role/status claims when *claims* is set."""
+    if claims:
+        return ClaimsJWTStrategy(secret=settings.secret_key, lifetime_seconds=ACCESS_TOKEN_LIFETIME)
     return JWTStrategy(secret=settings.secret_key, lifetime_seconds=ACCESS_TOKEN_LIFETIME)
 
 
+def get_jwt_strategy(app_settings: Settings = Depends(get_settings)) -> JWTStrategy:
+    """Dependency returning the strategy for the serving app's ``ACCESS_TOKEN_CLAIMS``."""
+    return jwt_strategy(app_settings.access_token_claims)
+
+
 auth_backend = AuthenticationBackend(
     name="jwt",
     transport=cookie_transport,
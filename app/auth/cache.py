@@ -0,0 +1,115 @@
+"""In-process cache of authenticated users.
+
+Every authenticated request resolves its ``User`` through
+``SQLAlchemyUserDatabase.get``. ``CachedUserDatabase`` serves that lookup from
+a per-worker LRU with a TTL; the TTL bounds how long another worker can see a
+stale row, and writes made through this process invalidate immediately.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Any
+from uuid import UUID
+
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+
+_COLUMN_KEYS = tuple(attr.key for attr in inspect(User).column_attrs)
+
+
+class PrincipalCache:
+    """LRU cache of user column values with a per-entry TTL.
+
+    Entries hold plain column values rather than ORM instances, so each hit
+    returns a fresh detached ``User`` that is never shared between requests.
+    A ``max_size`` or ``ttl_seconds`` of zero disables caching.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, user_id: UUID) -> User | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        user = User(**entry[1])
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, user: User) -> None:
+        if not self.enabled:
+            return
+        values = {key: getattr(user, key) for key in _COLUMN_KEYS}
+        self._entries[user.id] = (monotonic() + self.ttl_seconds, values)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and the current number of entries."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_max_size,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+class CachedUserDatabase(SQLAlchemyUserDatabase[User, UUID]):
+    """User database that serves ``get`` from ``principal_cache``.
+
+    ``update`` and ``delete`` (used by FastAPI-Users for profile changes and
+    deactivation) invalidate the cached entry once the change is committed.
+    """
+
+    async def get(self, id: UUID) -> User | None:
+        user = principal_cache.get(id)
+        if user is None:
+            user = await super().get(id)
+            if user is not None:
+                principal_cache.set(user)
+        return user
+
+    async def update(self, user: User, update_dict: dict[str, Any]) -> User:
+        user = await super().update(user, update_dict)
+        principal_cache.invalidate(user.id)
+        return user
+
+    async def delete(self, user: User) -> None:
+        user_id = user.id
+        await super().delete(user)
+        principal_cache.invalidate(user_id)
@@ -0,0 +1,66 @@
+"""Lightweight authenticated principal used for authorization.
+
+Routes that only need the caller's ID and role depend on ``current_principal``
+instead of ``current_active_user``. By default the principal is built from the
+loaded ``User``; with ``ACCESS_TOKEN_CLAIMS=true`` it is read from the signed
+access-token claims and no database lookup happens at all. The mode belongs
+to the app: ``create_app`` swaps in ``principal_from_claims`` when its settings
+enable claims.
+"""
+
+from dataclasses import dataclass
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+
+from app.auth.backend import ACCESS_TOKEN_LIFETIME, ClaimsJWTStrategy, cookie_transport
+from app.auth.users import current_active_user
+from app.config import settings
+from app.models.user import User
+
+_claims_strategy = ClaimsJWTStrategy(
+    secret=settings.secret_key, lifetime_seconds=ACCESS_TOKEN_LIFETIME
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The authenticated caller: identity plus the fields needed for role checks."""
+
+    id: UUID
+    role: str
+    is_active: bool
+    is_superuser: bool
+
+
+async def principal_from_user(user: User = Depends(current_active_user)) -> Principal:
+    """Build the principal from the active user loaded by FastAPI-Users."""
+    return Principal(
+        id=user.id,
+        role=user.role,
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+    )
+
+
+async def principal_from_claims(
+    token: str | None = Depends(cookie_transport.scheme),
+) -> Principal:
+    """Build the principal from the access-token claims without touching the database."""
+    claims = _claims_strategy.read_claims(token) if token is not None else None
+    if claims is None or not claims["is_active"]:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    try:
+        user_id = UUID(claims["sub"])
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED) from None
+    return Principal(
+        id=user_id,
+        role=claims["role"],
+        is_active=True,
+        is_superuser=bool(claims["is_superuser"]),
+    )
+
+
+# Replaced by principal_from_claims for apps built with ACCESS_TOKEN_CLAIMS=true.
+current_principal = principal_from_user
@@ -1,9 +1,10 @@
+import asyncio
 import uuid
 from datetime import UTC, datetime, timedelta
 
 from fastapi import Response
 from fastapi_users.jwt import decode_jwt, generate_jwt
-from sqlalchemy import select, update
+from sqlalchemy import delete, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
@@ -12,26 +13,30 @@ from app.models.refresh_token import RefreshToken
 REFRESH_TOKEN_LIFETIME = timedelta(days=7)
 REFRESH_COOKIE_NAME = "app_refresh"
 REFRESH_AUDIENCE = ["app:refresh"]
+# A token presented again this soon after it was rotated lost a concurrent refresh
+# (e.g. two tabs); it is rejected without revoking the family.
+REFRESH_REUSE_GRACE = timedelta(seconds=10)
 
 
-async def create_refresh_token(
+def _add_refresh_token(
     user_id: str,
     session: AsyncSession,
     family: str | None = None,
 ) -> str:
+    """Stage a new refresh token on *session* without committing and return its JWT."""
     token_id = uuid.uuid4()
     token_family = family or uuid.uuid4().hex
     expires_at = datetime.now(UTC) + REFRESH_TOKEN_LIFETIME
 
-    db_token = RefreshToken(
-        id=token_id,
-        user_id=uuid.UUID(user_id),
-        token_family=token_family,
-        is_revoked=False,
-        expires_at=expires_at,
+    session.add(
+        RefreshToken(
+            id=token_id,
+            user_id=uuid.UUID(user_id),
+            token_family=token_family,
+            is_revoked=False,
+            expires_at=expires_at,
+        )
     )
-    session.add(db_token)
-    await session.commit()
 
     jwt_data = {
         "sub": user_id,
@@ -46,10 +51,29 @@ async def create_refresh_token(
     )
 
 
+async def create_refresh_token(
+    user_id: str,
+    session: AsyncSession,
+    family: str | None = None,
+) -> str:
+    refresh_jwt = _add_refresh_token(user_id, session, family=family)
+    await session.commit()
+    return refresh_jwt
+
+
 async def validate_and_rotate_refresh_token(
     token_jwt: str,
     session: AsyncSession,
 ) -> tuple[str, str] | None:
+    """Revoke the presented refresh token and issue its successor in one transaction.
+
+    The revoke is a conditional ``UPDATE ... RETURNING`` that only matches a
+    live, unexpired token, so of several concurrent refreshes with the same
+    token exactly one succeeds. Presenting an already revoked token is treated
+    as reuse and revokes the whole family, unless it was rotated less than
+    ``REFRESH_REUSE_GRACE`` ago: then the request lost a concurrent refresh
+    and is only rejected, leaving the winner's new token usable.
+    """
     try:
         payload = decode_jwt(
             token_jwt,
@@ -66,31 +90,54 @@ async def validate_and_rotate_refresh_token(
     if not jti or not user_id or not family:
         return None
 
-    # Look up the token in DB
-    result = await session.execute(select(RefreshToken).where(RefreshToken.id == uuid.UUID(jti)))
-    db_token = result.scalar_one_or_none()
-
-    if db_token is None:
+    try:
+        token_id = uuid.UUID(jti)
+    except ValueError:
         return None
 
-    # If revoked, this is a reuse — revoke the entire family (theft detection)
-    if db_token.is_revoked:
-        await session.execute(
-            update(RefreshToken).where(RefreshToken.token_family == family).values(is_revoked=True)
+    # Revoke the current token only if it is still live
+    now = datetime.now(UTC)
+    rotated = await session.scalar(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == token_id,
+            RefreshToken.is_revoked == False,  # noqa: E712
+            RefreshToken.expires_at > now,
         )
-        await session.commit()
-        return None
+        .values(is_revoked=True, replaced_at=now)
+        .returning(RefreshToken.id)
+        .execution_options(synchronize_session=False)
+    )
 
-    # Check expiration
-    if db_token.expires_at.replace(tzinfo=UTC) < datetime.now(UTC):
+    if rotated is None:
+        # Unknown, expired or already revoked. If revoked other than by a rotation
+        # within the grace period, this is a reuse — revoke the entire family
+        # (theft detection)
+        reused = await session.scalar(
+            select(RefreshToken.id).where(
+                RefreshToken.id == token_id,
+                RefreshToken.is_revoked == True,  # noqa: E712
+                or_(
+                    RefreshToken.replaced_at.is_(None),
+                    RefreshToken.replaced_at <= now - REFRESH_REUSE_GRACE,
+                ),
+            )
+        )
+        if reused is not None:
+            await session.execute(
+                update(RefreshToken)
+                .where(RefreshToken.token_family == family)
+                .values(is_revoked=True)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        else:
+            await session.rollback()
         return None
 
-    # Revoke the current token
-    db_token.is_revoked = True
-    await session.flush()
-
-    # Issue a new token in the same family
-    new_jwt = await create_refresh_token(user_id, session, family=family)
+    # Issue a new token in the same family, committed together with the revoke
+    new_jwt = _add_refresh_token(user_id, session, family=family)
+    await session.commit()
 
     return (user_id, new_jwt)
 
@@ -119,15 +166,35 @@ def clear_refresh_cookie(response: Response) -> None:
     )
 
 
-async def cleanup_expired_tokens(session: AsyncSession) -> int:
-    result = await session.execute(
-        select(RefreshToken).where(
-            (RefreshToken.expires_at < datetime.now(UTC)) | (RefreshToken.is_revoked == True)  # noqa: E712
+async def cleanup_expired_tokens(
+    session: AsyncSession,
+    *,
+    batch_size: int = 1000,
+    pause: float = 0.0,
+) -> int:
+    """Delete expired and revoked refresh tokens, *batch_size* rows per transaction.
+
+    Each batch is a set-based ``DELETE ... WHERE id IN (SELECT id ... LIMIT n)``
+    committed on its own, with *pause* seconds between batches so a large
+    backlog doesn't hold locks or saturate the database. Returns rows deleted.
+    """
+    total = 0
+    while True:
+        stale = (
+            select(RefreshToken.id)
+            .where(
+                (RefreshToken.expires_at < datetime.now(UTC)) | (RefreshToken.is_revoked == True)  # noqa: E712
+            )
+            .limit(batch_size)
         )
-    )
-    tokens = result.scalars().all()
-    count = len(tokens)
-    for token in tokens:
-        await session.delete(token)
-    await session.commit()
-    return count
+        result = await session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(stale.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+        if pause:
+            await asyncio.sleep(pause)
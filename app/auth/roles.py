@@ -2,8 +2,7 @@ from enum import StrEnum
 
 from fastapi import Depends, HTTPException, status
 
-from app.auth.users import current_active_user
-from app.models.user import User
+from app.auth.principal import Principal, current_principal
 
 
 class UserRole(StrEnum):
@@ -14,11 +13,12 @@ class UserRole(StrEnum):
 def require_role(*allowed_roles: str):
     """Dependency factory that checks the user has one of the allowed roles.
 
-    Superusers bypass the role check. Returns the authenticated User so
-    routes don't need a separate ``Depends(current_active_user)``.
+    Superusers bypass the role check. Returns the authenticated Principal so
+    routes don't need a separate ``Depends(current_principal)``. In claims
+    mode (``ACCESS_TOKEN_CLAIMS=true``) the check needs no database lookup.
     """
 
-    async def _check_role(user: User = Depends(current_active_user)) -> User:
+    async def _check_role(user: Principal = Depends(current_principal)) -> Principal:
         if user.is_superuser:
             return user
         if user.role not in allowed_roles:
@@ -3,6 +3,8 @@ from enum import StrEnum
 import structlog
 from fastapi import Request
 
+from app.metrics import security_events
+
 logger = structlog.get_logger("app.security")
 
 
@@ -23,6 +25,8 @@ def log_security_event(
     email: str | None = None,
     detail: str | None = None,
 ) -> None:
+    security_events.inc(event.value)
+
     ip = None
     user_agent = None
     if request is not None:
@@ -0,0 +1,117 @@
+"""Weekly range partitions of ``refresh_tokens`` on PostgreSQL.
+
+Each partition holds the tokens expiring in one UTC week (Monday to Monday)
+and is named ``refresh_tokens_pYYYYMMDD`` after its first day. Maintenance
+creates partitions far enough ahead that new tokens never land in the
+``refresh_tokens_default`` catch-all, and drops a partition outright once
+every token in it has expired — no row-by-row deletes, no vacuum churn.
+Indexes declared on the parent are created on each partition by PostgreSQL.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.auth.refresh import REFRESH_TOKEN_LIFETIME
+
+PARTITION_INTERVAL = timedelta(weeks=1)
+# Weeks created beyond the latest possible expiry of a token issued now.
+PARTITIONS_AHEAD = 4
+
+TABLE = "refresh_tokens"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{8}})$")
+
+
+@dataclass(slots=True)
+class PartitionMaintenance:
+    """What one maintenance run changed."""
+
+    created: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    # Estimated rows removed with the dropped partitions (from pg_class.reltuples).
+    rows_dropped: int = 0
+
+
+def partition_start(moment: datetime) -> datetime:
+    """Start (Monday 00:00 UTC) of the partition containing *moment*."""
+    day = moment.astimezone(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def partition_name(start: datetime) -> str:
+    return f"{TABLE}_p{start:%Y%m%d}"
+
+
+def partition_starts(now: datetime) -> list[datetime]:
+    """Partitions that must exist at *now*: the current week through the look-ahead."""
+    first = partition_start(now)
+    last = partition_start(now + REFRESH_TOKEN_LIFETIME) + PARTITIONS_AHEAD * PARTITION_INTERVAL
+    starts = []
+    while first <= last:
+        starts.append(first)
+        first += PARTITION_INTERVAL
+    return starts
+
+
+async def existing_partitions(conn: AsyncConnection) -> dict[str, int]:
+    """Weekly partitions of the table, mapped to their estimated row counts."""
+    result = await conn.execute(
+        text(
+            "SELECT c.relname, c.reltuples::bigint FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": TABLE},
+    )
+    return {name: max(rows, 0) for name, rows in result if _PARTITION_NAME.match(name)}
+
+
+async def create_partition(conn: AsyncConnection, start: datetime) -> str:
+    """Create the partition starting at *start*, moving any matching rows out of the default.
+
+    The partition is built detached and then attached, so rows that fell into
+    the default partition for this range don't block the attach.
+    """
+    name = partition_name(start)
+    bounds = {"start": start, "end": start + PARTITION_INTERVAL}
+    in_range = "expires_at >= :start AND expires_at < :end"
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)"))
+    await conn.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds
+    )
+    await conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    # Partition bounds must be literals, not bind parameters.
+    await conn.execute(
+        text(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+        )
+    )
+    return name
+
+
+async def maintain_partitions(
+    conn: AsyncConnection, now: datetime | None = None
+) -> PartitionMaintenance:
+    """Create upcoming partitions and drop those whose tokens have all expired."""
+    now = now or datetime.now(UTC)
+    report = PartitionMaintenance()
+    existing = await existing_partitions(conn)
+
+    for start in partition_starts(now):
+        if partition_name(start) not in existing:
+            report.created.append(await create_partition(conn, start))
+
+    for name, rows in sorted(existing.items()):
+        start = datetime.strptime(_PARTITION_NAME.match(name).group(1), "%Y%m%d")
+        if start.replace(tzinfo=UTC) + PARTITION_INTERVAL <= now:
+            await conn.execute(text(f"DROP TABLE {name}"))
+            report.dropped.append(name)
+            report.rows_dropped += rows
+    return report
@@ -5,14 +5,14 @@ import structlog
 from fastapi import Depends, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin, models
-from fastapi_users.db import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.backend import auth_backend
+from app.auth.cache import CachedUserDatabase
 from app.auth.refresh import create_refresh_token, set_refresh_cookie
 from app.auth.security_logging import SecurityEvent, log_security_event
 from app.config import settings
-from app.database import async_session_maker, get_async_session
+from app.database import get_async_session
 from app.models.user import User
 
 logger = structlog.get_logger(__name__)
@@ -20,8 +20,8 @@ logger = structlog.get_logger(__name__)
 
 async def get_user_db(
     session: AsyncSession = Depends(get_async_session),
-) -> AsyncGenerator[SQLAlchemyUserDatabase, None]:
-    yield SQLAlchemyUserDatabase(session, User)
+) -> AsyncGenerator[CachedUserDatabase, None]:
+    yield CachedUserDatabase(session, User)
 
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
@@ -49,9 +49,8 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
             email=user.email,
         )
         if response is not None:
-            async with async_session_maker() as session:
-                refresh_jwt = await create_refresh_token(str(user.id), session)
-                set_refresh_cookie(response, refresh_jwt)
+            refresh_jwt = await create_refresh_token(str(user.id), self.user_db.session)
+            set_refresh_cookie(response, refresh_jwt)
 
     async def authenticate(
         self,
@@ -74,12 +73,15 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, UUID]):
 
 
 async def get_user_manager(
-    user_db: SQLAlchemyUserDatabase = Depends(get_user_db),
+    user_db: CachedUserDatabase = Depends(get_user_db),
 ) -> AsyncGenerator[UserManager, None]:
     yield UserManager(user_db)
 
 
 fastapi_users = FastAPIUsers[User, UUID](get_user_manager, [auth_backend])
 
+# The authenticated user always comes from the primary: the row is cached in
+# principal_cache and authorizes requests, so a lagging replica's stale role or
+# status must never be used (or cached) after an admin changes it.
 current_active_user = fastapi_users.current_user(active=True)
 current_superuser = fastapi_users.current_user(active=True, superuser=True)
@@ -0,0 +1,63 @@
+"""Conditional GET helpers: strong ETags and ``If-None-Match`` handling.
+
+A representation's ETag is derived from the ``(id, updated_at)`` versions of
+the rows it contains, so it can be checked with a query that loads only
+those columns. ``updated_at`` is bumped on every write, so a changed row, an
+added row or a removed row all change the tag.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from email.utils import format_datetime
+from uuid import UUID
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Per-user data: caches must revalidate with the server before reuse.
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(versions: Iterable[tuple[UUID, datetime]], *extra: object) -> str:
+    """Strong ETag over row versions plus any *extra* parts of the representation."""
+    digest = hashlib.sha256()
+    for row_id, updated_at in versions:
+        digest.update(f"{row_id}:{updated_at.isoformat()};".encode())
+    for part in extra:
+        digest.update(f"|{part}".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def http_date(moment: datetime) -> str:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return format_datetime(moment.astimezone(UTC), usegmt=True)
+
+
+def if_none_match(request: Request) -> list[str] | None:
+    """Entity tags listed in ``If-None-Match`` (weak prefixes stripped), or None if absent."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(tags: list[str] | None, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for ``If-None-Match``."""
+    return tags is not None and ("*" in tags or etag in tags)
+
+
+def set_validators(response: Response, etag: str, last_modified: datetime | None) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: datetime | None) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
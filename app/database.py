@@ -1,9 +1,22 @@
-from collections.abc import AsyncGenerator
+import itertools
+import os
+import time
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import exc, make_url, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
 
-from app.config import settings
+from app.config import Settings, settings
 
 
 class Base(DeclarativeBase):
@@ -12,19 +25,199 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.is_development,
-)
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a free connection.
 
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+    Only checkouts made while the pool is at ``pool_size + max_overflow`` and
+    has no idle connection count as waits; opening a new connection doesn't.
+    ``on_wait``, if set, is called with each wait's duration in seconds.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.on_wait: Callable[[float], None] | None = None
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.on_wait = self.on_wait
+        return pool
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        if self._max_overflow < 0 or self.overflow() < self._max_overflow or self.checkedin():
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.waits += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if self.on_wait is not None:
+                self.on_wait(waited)
+
+
+def engine_options(database_url: str, app_settings: Settings | None = None) -> dict[str, Any]:
+    """Pool and driver options for *database_url* from *app_settings* (default: settings).
+
+    Pool sizing only applies to PostgreSQL; SQLite keeps SQLAlchemy's default
+    pool for its URL (e.g. a single static connection for ``:memory:``).
+    """
+    if app_settings is None:
+        app_settings = settings
+    if make_url(database_url).get_backend_name() != "postgresql":
+        return {}
+    connect_args: dict[str, Any] = {
+        "statement_cache_size": app_settings.db_statement_cache_size,
+        "prepared_statement_cache_size": app_settings.db_statement_cache_size,
+    }
+    if app_settings.db_statement_cache_size == 0:
+        # PgBouncer in transaction mode can hand each statement a different
+        # server connection, so prepared statement names must never repeat.
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": app_settings.db_pool_size,
+        "max_overflow": app_settings.db_max_overflow,
+        "pool_timeout": app_settings.db_pool_timeout,
+        "pool_recycle": app_settings.db_pool_recycle,
+        "pool_pre_ping": app_settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+class ReplicaSet:
+    """Read replicas, handed out round-robin; empty when none are configured."""
+
+    def __init__(self, urls: list[str], app_settings: Settings | None = None) -> None:
+        self.engines = [
+            create_async_engine(url, **engine_options(url, app_settings)) for url in urls
+        ]
+        self._session_makers = itertools.cycle(
+            [
+                async_sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+                for replica in self.engines
+            ]
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def session(self) -> AsyncSession:
+        """A new session on the next replica in turn."""
+        return next(self._session_makers)()
+
+
+# The primary engine, its session factory and the read replicas are built on
+# first access rather than at import, so importing the models (Alembic, tools,
+# tests) neither creates an engine nor loads the database driver.
+engine: AsyncEngine
+async_session_maker: async_sessionmaker[AsyncSession]
+replicas: ReplicaSet
+
+_LAZY_RESOURCES: dict[str, Callable[[Settings], Any]] = {
+    "engine": lambda config: create_async_engine(
+        config.database_url,
+        echo=config.is_development,
+        **engine_options(config.database_url, config),
+    ),
+    "async_session_maker": lambda config: async_sessionmaker(
+        _resource("engine"), class_=AsyncSession, expire_on_commit=False
+    ),
+    "replicas": lambda config: ReplicaSet(config.database_replica_url_list, config),
+}
+
+
+def __getattr__(name: str) -> Any:
+    factory = _LAZY_RESOURCES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = factory(settings)
+    return value
+
+
+def _resource(name: str) -> Any:
+    # Names used inside this module don't go through the module __getattr__.
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+def init_engines(app_settings: Settings | None = None) -> None:
+    """Create the primary and replica engines now rather than on first use.
+
+    They are built from *app_settings* (default: settings); resources that
+    already exist are kept.
+    """
+    if app_settings is None:
+        app_settings = settings
+    created = globals()
+    for name, factory in _LAZY_RESOURCES.items():
+        if name not in created:
+            created[name] = factory(app_settings)
+
+
+async def dispose_engines() -> None:
+    """Close the pooled connections of every engine created so far."""
+    created = globals()
+    if "engine" in created:
+        await created["engine"].dispose()
+    if "replicas" in created:
+        for replica in created["replicas"].engines:
+            await replica.dispose()
+
+
+def pool_stats(bind: AsyncEngine | None = None) -> dict[str, Any]:
+    """Live connection pool counters for this worker process."""
+    pool = (bind or _resource("engine")).pool
+    stats: dict[str, Any] = {"pid": os.getpid(), "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            waits=pool.waits,
+            wait_seconds_total=round(pool.wait_seconds_total, 6),
+            wait_seconds_max=round(pool.wait_seconds_max, 6),
+            timeouts=pool.timeouts,
+        )
+    return stats
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency that provides an async database session."""
-    async with async_session_maker() as session:
+    async with _resource("async_session_maker")() as session:
         yield session
+
+
+@asynccontextmanager
+async def advisory_lock(key: int, *, bind: AsyncEngine | None = None) -> AsyncIterator[bool]:
+    """Try to take a cluster-wide PostgreSQL advisory lock without waiting.
+
+    Yields whether the lock was acquired; it is held on a dedicated connection
+    until the block exits. Other databases have no shared lock, so the lock is
+    always granted (single-process deployments).
+    """
+    bind = bind or _resource("engine")
+    if bind.dialect.name != "postgresql":
+        yield True
+        return
+    async with bind.connect() as conn:
+        acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": key})
+        await conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                await conn.commit()
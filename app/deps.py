@@ -0,0 +1,42 @@
+"""FastAPI dependencies for settings and database sessions.
+
+Kept apart from ``app.config`` and ``app.database`` so that importing those
+(and the models, as Alembic and other tools do) doesn't load FastAPI.
+"""
+
+from collections.abc import AsyncGenerator
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import database
+from app.config import Settings, settings
+from app.database import ReplicaSet, get_async_session
+
+
+def get_settings(request: Request) -> Settings:
+    """Dependency returning the settings the serving app was built with.
+
+    ``create_app(settings)`` stores them on ``app.state``; apps built without
+    them fall back to the process-wide ``settings``.
+    """
+    return getattr(request.app.state, "settings", settings)
+
+
+async def get_read_session(
+    request: Request,
+    primary: AsyncSession = Depends(get_async_session),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides a session for read-only work.
+
+    Uses the next read replica, or the primary when no replicas are configured
+    or the client wrote recently (``request.state.read_from_primary``, set by
+    ``ReadYourWritesMiddleware``) and might not see its write on a lagging
+    replica yet. The primary session is only connected if it is used.
+    """
+    replica_set: ReplicaSet = database.replicas
+    if not replica_set or getattr(request.state, "read_from_primary", False):
+        yield primary
+        return
+    async with replica_set.session() as session:
+        yield session
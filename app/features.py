@@ -1,57 +1,233 @@
-"""Environment-variable-backed feature flags."""
+"""Feature flags with per-user targeting, hot-reloaded from a JSON file.
+
+Flags come from ``FEATURE_*`` env vars (plain on/off) and, optionally, a
+JSON file named by ``FEATURE_FLAGS_FILE`` whose entries override them::
+
+    {
+      "new_dashboard": true,
+      "beta_export": {"rollout": 25, "roles": ["admin"], "users": ["<user id>"]}
+    }
+
+A rule enables a flag for users in ``users``, users whose role is in
+``roles``, and ``rollout`` percent of everyone else, picked by a stable hash
+of flag name and user ID. A rule without any of those enables the flag for
+everybody; ``"enabled": false`` switches it off regardless.
+
+Rules are compiled into an immutable snapshot that is swapped atomically
+when the file changes, so ``is_enabled`` does no I/O and a constant amount
+of work per call.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
-from app.auth import current_active_user
-from app.models.user import User
+from app.auth import Principal, current_principal
+from app.conditional import compute_etag, etag_matches, if_none_match, not_modified, set_validators
+from app.config import Settings, settings
+from app.logging import get_logger
+
+logger = get_logger("app.features")
 
 router = APIRouter(tags=["features"])
 
 # Prefix used to discover feature flags from the environment.
 _ENV_PREFIX = "FEATURE_"
 
+# Rollout buckets: percentages are resolved to 0.01%.
+_BUCKETS = 10_000
+
+
+class FlagRule(BaseModel):
+    """Targeting rule for one flag, as written in the flags file."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    enabled: bool = True
+    rollout: float | None = Field(default=None, ge=0, le=100)
+    roles: list[str] = []
+    users: list[str] = []
+
+
+_flags_file_adapter = TypeAdapter(dict[str, bool | FlagRule])
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledFlag:
+    """A flag rule reduced to set lookups and a bucket threshold."""
+
+    name: str
+    threshold: int
+    roles: frozenset[str] = frozenset()
+    users: frozenset[str] = frozenset()
+
+    @classmethod
+    def compile(cls, name: str, rule: bool | FlagRule) -> CompiledFlag:
+        if isinstance(rule, bool):
+            return cls(name, _BUCKETS if rule else 0)
+        if not rule.enabled:
+            return cls(name, 0)
+        if rule.rollout is not None:
+            rollout = rule.rollout
+        else:
+            rollout = 0 if rule.roles or rule.users else 100
+        return cls(
+            name,
+            round(rollout * _BUCKETS / 100),
+            frozenset(rule.roles),
+            frozenset(rule.users),
+        )
+
+    def evaluate(self, user_id: str | None, role: str | None) -> bool:
+        if self.threshold >= _BUCKETS:
+            return True
+        if user_id is not None and user_id in self.users:
+            return True
+        if role is not None and role in self.roles:
+            return True
+        if self.threshold <= 0 or user_id is None:
+            return False
+        digest = hashlib.blake2b(f"{self.name}:{user_id}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest) % _BUCKETS < self.threshold
+
+
+@dataclass(frozen=True, slots=True)
+class FlagSnapshot:
+    """Compiled flags plus a version that changes whenever any rule does."""
+
+    flags: Mapping[str, CompiledFlag]
+    version: str
+
+
+def compile_flags(rules: Mapping[str, bool | FlagRule]) -> FlagSnapshot:
+    flags = {name.lower(): CompiledFlag.compile(name.lower(), rule) for name, rule in rules.items()}
+    serialized = {
+        name: rule if isinstance(rule, bool) else rule.model_dump() for name, rule in rules.items()
+    }
+    version = hashlib.sha256(json.dumps(serialized, sort_keys=True).encode()).hexdigest()[:16]
+    return FlagSnapshot(flags, version)
+
+
+def _env_rules() -> dict[str, bool | FlagRule]:
+    return {
+        key[len(_ENV_PREFIX) :].lower(): value.lower() in {"1", "true", "yes"}
+        for key, value in os.environ.items()
+        if key.startswith(_ENV_PREFIX)
+    }
+
 
 class FeatureFlags:
-    """Read ``FEATURE_*`` env vars at startup and expose a simple query API."""
+    """Evaluate flags against the current snapshot and reload it when the file changes."""
 
-    def __init__(self) -> None:
-        self._flags: dict[str, bool] = {}
-        for key, value in os.environ.items():
-            if key.startswith(_ENV_PREFIX):
-                flag_name = key[len(_ENV_PREFIX) :].lower()
-                self._flags[flag_name] = value.lower() in {"1", "true", "yes"}
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else None
+        self._file_stamp: tuple[int, int] | None = None
+        self._snapshot = self._load()
+
+    @property
+    def snapshot(self) -> FlagSnapshot:
+        return self._snapshot
 
     def is_enabled(self, flag_name: str, *, context: dict[str, Any] | None = None) -> bool:
         """Return whether *flag_name* is enabled.
 
-        An optional *context* dict (e.g. user info) is accepted for future
-        targeting support but is currently unused.
+        *context* may carry the caller's ``user_id`` and ``role`` for
+        targeted flags; without it only flags enabled for everyone are on.
         """
-        return self._flags.get(flag_name, False)
+        flag = self._snapshot.flags.get(flag_name)
+        if flag is None:
+            return False
+        if context is None:
+            return flag.evaluate(None, None)
+        user_id = context.get("user_id")
+        return flag.evaluate(str(user_id) if user_id is not None else None, context.get("role"))
 
     def all_flags(self) -> dict[str, bool]:
-        """Return a copy of every registered flag and its current state."""
-        return dict(self._flags)
+        """Return every registered flag and whether it is enabled for everyone."""
+        return {name: flag.evaluate(None, None) for name, flag in self._snapshot.flags.items()}
+
+    def evaluate(self, user_id: str | None, role: str | None) -> dict[str, bool]:
+        """Return every registered flag evaluated for one user."""
+        return {name: flag.evaluate(user_id, role) for name, flag in self._snapshot.flags.items()}
 
+    def reload(self) -> bool:
+        """Recompile the snapshot if the flags file changed; True if it was replaced.
 
-# Module-level singleton — initialised once at import time.
-feature_flags = FeatureFlags()
+        An unreadable or invalid file is logged and the current snapshot kept.
+        """
+        if self.path is None or self._stat() == self._file_stamp:
+            return False
+        try:
+            snapshot = self._load()
+        except (OSError, ValueError) as exc:
+            logger.warning("feature_flags.reload_failed", path=str(self.path), error=str(exc))
+            return False
+        changed = snapshot.version != self._snapshot.version
+        self._snapshot = snapshot
+        if changed:
+            logger.info("feature_flags.reloaded", version=snapshot.version)
+        return changed
+
+    def _stat(self) -> tuple[int, int] | None:
+        assert self.path is not None
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> FlagSnapshot:
+        rules = _env_rules()
+        if self.path is not None:
+            stamp = self._stat()
+            if stamp is not None:
+                rules.update(_flags_file_adapter.validate_json(self.path.read_bytes()))
+            self._file_stamp = stamp
+        return compile_flags(rules)
+
+
+# Process-wide instance, built on first use (or at startup) and then hot-reloaded.
+_feature_flags: FeatureFlags | None = None
+
+
+def init_feature_flags(app_settings: Settings) -> FeatureFlags:
+    """Build the feature flags singleton from *app_settings*, unless it already exists."""
+    global _feature_flags
+    if _feature_flags is None:
+        _feature_flags = FeatureFlags(app_settings.feature_flags_file)
+    return _feature_flags
 
 
 def get_feature_flags() -> FeatureFlags:
     """FastAPI dependency returning the feature flags singleton."""
-    return feature_flags
+    if _feature_flags is not None:
+        return _feature_flags
+    return init_feature_flags(settings)
 
 
 @router.get("/flags")
 async def list_flags(
-    user: User = Depends(current_active_user),
+    request: Request,
+    response: Response,
+    user: Principal = Depends(current_principal),
     flags: FeatureFlags = Depends(get_feature_flags),
 ) -> dict[str, bool]:
-    """Return enabled feature flags for the current user."""
-    return flags.all_flags()
+    """Return feature flags evaluated for the current user.
+
+    The ETag covers the snapshot version and the user's ID and role, which
+    together determine every value in the response.
+    """
+    etag = compute_etag((), flags.snapshot.version, user.id, user.role)
+    if etag_matches(if_none_match(request), etag):
+        return not_modified(etag, None)
+    set_validators(response, etag, None)
+    return flags.evaluate(str(user.id), user.role)
@@ -1,15 +1,75 @@
-"""Structured logging configuration using structlog."""
+"""Structured logging configuration using structlog.
 
+By default records are not written on the thread that logs them: the root
+handler only puts them on a bounded queue, and a listener thread renders
+them to JSON (or console output) and writes them to stdout. A stalled stdout
+pipe then fills the queue instead of blocking the event loop.
+"""
+
+import atexit
+import copy
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 
 import structlog
 
-from app.config import settings
+from app.config import Settings, settings
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: "BoundedQueueHandler | None" = None
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    When the queue is full the record is dropped and counted, or with
+    ``block=True`` the caller waits until the listener makes room.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *, block: bool = False) -> None:
+        super().__init__(log_queue)
+        self.block = block
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
 
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog records carry their event dict in ``msg`` and are rendered by the
+        # listener. Foreign records get their %-args merged now, so mutable arguments
+        # cannot change before they are written.
+        if isinstance(record.msg, dict) or not record.args:
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
-def setup_logging() -> None:
-    """Configure structlog with JSON output in production, colored console in dev."""
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The default uses put_nowait, which fails while the queue is full.
+        self.queue.put(self._sentinel)
+
+
+def setup_logging(app_settings: Settings | None = None) -> None:
+    """Configure structlog with JSON output in production, colored console in dev.
+
+    Level, format and queueing come from *app_settings* (default: settings).
+    """
+    if app_settings is None:
+        app_settings = settings
     shared_processors: list[structlog.types.Processor] = [
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_log_level,
@@ -19,7 +79,7 @@ def setup_logging() -> None:
         structlog.processors.UnicodeDecoder(),
     ]
 
-    if settings.is_development:
+    if app_settings.is_development:
         renderer: structlog.types.Processor = structlog.dev.ConsoleRenderer()
     else:
         renderer = structlog.processors.JSONRenderer()
@@ -44,15 +104,73 @@ def setup_logging() -> None:
     handler = logging.StreamHandler(sys.stdout)
     handler.setFormatter(formatter)
 
+    shutdown_logging()
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
-    root_logger.addHandler(handler)
-    root_logger.setLevel(settings.log_level.upper())
+    root_logger.addHandler(
+        _start_queue(handler, app_settings) if app_settings.log_queue_size > 0 else handler
+    )
+    root_logger.setLevel(app_settings.log_level.upper())
 
     # Quiet noisy third-party loggers
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
 
+def _start_queue(handler: logging.Handler, app_settings: Settings) -> BoundedQueueHandler:
+    global _listener, _queue_handler
+    log_queue: queue.Queue = queue.Queue(maxsize=app_settings.log_queue_size)
+    _queue_handler = BoundedQueueHandler(
+        log_queue, block=app_settings.log_queue_full_policy == "block"
+    )
+    _listener = _FlushingQueueListener(log_queue, handler)
+    _listener.start()
+    return _queue_handler
+
+
+def shutdown_logging() -> None:
+    """Write out every queued record and stop the listener thread.
+
+    Later records are written synchronously. Registered with ``atexit``;
+    safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _listener is None or _queue_handler is None:
+        return
+    listener, queue_handler = _listener, _queue_handler
+    _listener = _queue_handler = None
+    root_logger = logging.getLogger()
+    root_logger.removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        root_logger.addHandler(handler)
+    if queue_handler.dropped:
+        summary = logging.LogRecord(
+            "app.logging",
+            logging.WARNING,
+            __file__,
+            0,
+            "%d log records dropped because the log queue was full",
+            (queue_handler.dropped,),
+            None,
+        )
+        for handler in listener.handlers:
+            handler.handle(summary)
+
+
+def log_queue_stats() -> dict[str, int] | None:
+    """Queue depth and dropped-record count, or None when logging synchronously."""
+    if _queue_handler is None:
+        return None
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "capacity": _queue_handler.queue.maxsize,
+        "dropped": _queue_handler.dropped,
+    }
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: str | None = None) -> structlog.stdlib.BoundLogger:
     """Return a structlog bound logger."""
     return structlog.get_logger(name)
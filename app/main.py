@@ -1,152 +1,195 @@
-import time
-import uuid
-
-import structlog
-from fastapi import Depends, FastAPI, Request, Response
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from limits import RateLimitItem, parse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
-
-from app.auth import auth_backend, current_active_user, fastapi_users
-from app.auth.security_logging import SecurityEvent, log_security_event
-from app.config import settings
-from app.features import router as features_router
-from app.logging import setup_logging
-from app.models.user import User
-from app.routers import admin_router, notes_router
-from app.routers.auth_refresh import router as auth_refresh_router
-from app.schemas.user import UserCreate, UserRead
-from app.telemetry import setup_telemetry
-
-setup_logging()
-logger = structlog.get_logger("app.request")
-
-app = FastAPI(
-    title="API Template",
-    description="FastAPI template with async PostgreSQL and cookie-based JWT auth",
-    version="0.2.0",
-)
-
-setup_telemetry(app)
-
-# CORS configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origin_list,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
-)
-
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
-# --- Auth routes ---
-# Custom refresh/logout routes (included before FastAPI-Users so /auth/jwt/logout is shadowed)
-app.include_router(auth_refresh_router)
-app.include_router(
-    fastapi_users.get_auth_router(auth_backend),
-    prefix="/auth/jwt",
-    tags=["auth"],
-)
-app.include_router(
-    fastapi_users.get_register_router(UserRead, UserCreate),
-    prefix="/auth",
-    tags=["auth"],
-)
-# --- End auth routes ---
-
-
-@app.get("/auth/me", response_model=UserRead, tags=["auth"])
-async def get_current_user(user: User = Depends(current_active_user)):
-    return user
-
-
-# Path-specific rate limits for auth endpoints
-_AUTH_RATE_LIMITS: dict[str, RateLimitItem] = {
-    "/auth/jwt/login": parse("5/minute"),
-    "/auth/register": parse("3/minute"),
-    "/auth/refresh": parse("30/minute"),
-}
-
-
-@app.middleware("http")
-async def rate_limit_auth(request: Request, call_next) -> Response:
-    """Apply rate limits to auth endpoints."""
-    rate_limit = _AUTH_RATE_LIMITS.get(request.url.path)
-    if rate_limit and request.method == "POST":
-        key = get_remote_address(request)
-        if not limiter._limiter.hit(rate_limit, key):
-            log_security_event(
-                SecurityEvent.RATE_LIMIT_HIT,
-                request=request,
-                detail=f"path={request.url.path}",
-            )
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Rate limit exceeded"},
-            )
-    return await call_next(request)
-
-
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next) -> Response:
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
-    response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
-    return response
-
-
-@app.middleware("http")
-async def request_id_middleware(request: Request, call_next) -> Response:
-    """Assign a unique request ID to every request."""
-    request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-    request.state.request_id = request_id
-    structlog.contextvars.clear_contextvars()
-    structlog.contextvars.bind_contextvars(request_id=request_id)
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
-
-
-@app.middleware("http")
-async def request_logging_middleware(request: Request, call_next) -> Response:
-    """Log method, path, status code, and duration for every request."""
-    start = time.perf_counter()
-    response = await call_next(request)
-    duration_ms = round((time.perf_counter() - start) * 1000, 2)
-    logger.info(
-        "request",
-        method=request.method,
-        path=request.url.path,
-        status_code=response.status_code,
-        duration_ms=duration_ms,
+"""Application factory.
+
+``create_app()`` assembles the FastAPI application: routers, middleware,
+rate limits and telemetry. Importing this module does none of that, and the
+database engines, feature flags and background tasks are only created when
+the app starts (in its lifespan) or on first use, so tools that import the
+package stay fast. The lifespan also installs the query profiler and SQL
+tracing on the engines it creates.
+
+``app`` is built on first access, so ``uvicorn app.main:app`` and
+``from app.main import app`` keep working; ``uvicorn --factory
+app.main:create_app`` builds a fresh instance instead.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from app.config import Settings
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Build the process's resources before serving and release them after."""
+    from app import database
+    from app.analytics import analytics_lifespan
+    from app.features import init_feature_flags
+    from app.metrics import metrics_lifespan
+    from app.profiling import install_query_profiler
+    from app.tasks import background_tasks
+    from app.telemetry import instrument_database
+
+    settings: Settings = app.state.settings
+    database.init_engines(settings)
+    # Per-engine instrumentation needs the engines, so it is installed here
+    # rather than in create_app.
+    if settings.query_profiler_enabled:
+        for engine in (database.engine, *database.replicas.engines):
+            install_query_profiler(engine)
+    instrument_database(app)
+    init_feature_flags(settings)
+    try:
+        async with (
+            background_tasks(settings),
+            analytics_lifespan(settings),
+            metrics_lifespan(settings),
+        ):
+            yield
+    finally:
+        await database.dispose_engines()
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Build the application.
+
+    *settings* (default: ``app.config.settings``) controls how the app is
+    wired, its logging and telemetry, and what its lifespan starts: database
+    engines, feature flags, background tasks, analytics and metrics. The
+    engines and flags are per process, so they come from the settings of the
+    first app to start. Modules that read configuration at request time still
+    use the process-wide settings.
+    """
+    from fastapi import Depends, FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from limits import RateLimitItem, parse
+    from slowapi import Limiter, _rate_limit_exceeded_handler
+    from slowapi.errors import RateLimitExceeded
+    from slowapi.util import get_remote_address
+
+    from app.auth import auth_backend, current_active_user, current_principal, fastapi_users
+    from app.auth.principal import principal_from_claims
+    from app.features import router as features_router
+    from app.logging import setup_logging
+    from app.metrics import router as metrics_router
+    from app.middleware import ReadYourWritesMiddleware, RequestContextMiddleware
+    from app.models.user import User
+    from app.profiling import QueryProfilerMiddleware
+    from app.routers import admin_router, notes_router
+    from app.routers.auth_refresh import router as auth_refresh_router
+    from app.schemas.user import UserCreate, UserRead
+    from app.serialization import default_response_class
+    from app.telemetry import setup_telemetry
+
+    if settings is None:
+        from app.config import settings
+
+    setup_logging(settings)
+
+    app = FastAPI(
+        title="API Template",
+        description="FastAPI template with async PostgreSQL and cookie-based JWT auth",
+        version="0.2.0",
+        lifespan=lifespan,
+        default_response_class=default_response_class(settings.fast_json),
     )
-    return response
 
+    app.state.settings = settings
 
-# API routes
-app.include_router(admin_router)
-app.include_router(notes_router)
-app.include_router(features_router)
+    setup_telemetry(app, settings)
 
+    # CORS configuration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origin_list,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
+        allow_headers=["Authorization", "Content-Type"],
+    )
+
+    # Rate limiting
+    limiter = Limiter(key_func=get_remote_address)
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+    # Authorize from signed access-token claims, with no user lookup, when enabled
+    if settings.access_token_claims:
+        app.dependency_overrides[current_principal] = principal_from_claims
+
+    # --- Auth routes ---
+    # Custom refresh/logout routes (included before FastAPI-Users so /auth/jwt/logout is shadowed)
+    app.include_router(auth_refresh_router)
+    app.include_router(
+        fastapi_users.get_auth_router(auth_backend),
+        prefix="/auth/jwt",
+        tags=["auth"],
+    )
+    app.include_router(
+        fastapi_users.get_register_router(UserRead, UserCreate),
+        prefix="/auth",
+        tags=["auth"],
+    )
+    # --- End auth routes ---
+
+    @app.get("/auth/me", response_model=UserRead, tags=["auth"])
+    async def get_current_user(user: User = Depends(current_active_user)):
+        return user
+
+    # Path-specific rate limits for auth endpoints, enforced by RequestContextMiddleware
+    auth_rate_limits: dict[str, RateLimitItem] = {
+        "/auth/jwt/login": parse("5/minute"),
+        "/auth/register": parse("3/minute"),
+        "/auth/refresh": parse("30/minute"),
+    }
+
+    # Send a client's reads to the primary for a short window after it writes
+    # (only active when DATABASE_REPLICA_URLS is set)
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.replica_sticky_seconds)
+
+    # Per-request SQL profile in Server-Timing (opt-in; nothing is installed otherwise)
+    if settings.query_profiler_enabled:
+        app.add_middleware(
+            QueryProfilerMiddleware, repeat_threshold=settings.query_profiler_repeat_threshold
+        )
+
+    # Request IDs, rate limits, security headers and (sampled) access logs in a single ASGI
+    # pass. Added last so it wraps CORS and sees every response.
+    app.add_middleware(
+        RequestContextMiddleware,
+        limiter=limiter,
+        rate_limits=auth_rate_limits,
+        sample_rate=settings.request_log_sample_rate,
+        slow_ms=settings.request_log_slow_ms,
+        exclude_paths=settings.request_log_exclude_path_set,
+    )
+
+    # API routes
+    app.include_router(admin_router)
+    app.include_router(notes_router)
+    app.include_router(features_router)
+    app.include_router(metrics_router)
+
+    @app.get("/")
+    async def root():
+        """Health check endpoint."""
+        return {"status": "ok", "message": "API Template"}
+
+    @app.get("/health")
+    async def health_check():
+        """Detailed health check."""
+        return {"status": "healthy"}
 
-@app.get("/")
-async def root():
-    """Health check endpoint."""
-    return {"status": "ok", "message": "API Template"}
+    return app
 
 
-@app.get("/health")
-async def health_check():
-    """Detailed health check."""
-    return {"status": "healthy"}
+def __getattr__(name: str) -> FastAPI:
+    # ``app`` is created on first access and then cached as a module global.
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    app = globals()["app"] = create_app()
+    return app
@@ -0,0 +1,359 @@
+"""In-process metrics registry with a Prometheus text endpoint.
+
+Metrics are plain dicts keyed by label values and updated on the event loop
+thread, so recording a sample is a dict lookup and an addition. ``GET
+/metrics`` renders them in the Prometheus text exposition format, for
+scrapers presenting ``METRICS_TOKEN`` as a bearer token (without a token
+configured, the endpoint is off).
+
+Every uvicorn worker is a separate process with its own registry. With
+``METRICS_MULTIPROC_DIR`` set, each worker periodically writes its state to
+``<dir>/<pid>.json`` and a scrape served by any worker merges all of them:
+counters and histograms are summed over every file (so totals survive
+worker restarts), gauges only over workers that wrote recently. The
+directory should be emptied before the server starts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import secrets
+import time
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import Settings, settings
+from app.database import pool_stats
+from app.deps import get_settings
+from app.logging import get_logger
+
+logger = get_logger("app.metrics")
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A worker's gauges are dropped from merged output once its state file is
+# older than this many flush intervals.
+_STALE_INTERVALS = 3
+
+Labels = tuple[str, ...]
+
+
+class _Metric:
+    """Base metric; with *function* (returning label tuple -> value), samples are read at collection."""
+
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        *,
+        function: Callable[[], dict[Labels, Any]] | None = None,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self.samples: dict[Labels, Any] = {}
+
+    def state(self) -> list[list[Any]]:
+        if self.function is not None:
+            self.samples = self.function()
+        return [[list(labels), value] for labels, value in self.samples.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.samples[labels] = self.samples.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self.samples[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.samples[labels] = self.samples.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Histogram whose samples are ``[count per bucket..., count above, sum]``."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        *,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str) -> None:
+        sample = self.samples.get(labels)
+        if sample is None:
+            sample = self.samples[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        sample[bisect_left(self.buckets, value)] += 1
+        sample[-1] += value
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+
+    def register[M: _Metric](self, metric: M) -> M:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> dict[str, list[list[Any]]]:
+        """JSON-serializable state of every metric."""
+        return {name: metric.state() for name, metric in self.metrics.items()}
+
+    def merge(self, states: Iterable[tuple[dict[str, list[list[Any]]], bool]]) -> dict:
+        """Combine per-worker states; each comes with whether the worker is live."""
+        merged: dict[str, dict[Labels, Any]] = {name: {} for name in self.metrics}
+        for state, live in states:
+            for name, samples in state.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not live):
+                    continue
+                target = merged[name]
+                for labels, value in samples:
+                    key = tuple(labels)
+                    if metric.kind == "histogram":
+                        current = target.get(key)
+                        target[key] = (
+                            list(value)
+                            if current is None
+                            else [a + b for a, b in zip(current, value, strict=True)]
+                        )
+                    else:
+                        target[key] = target.get(key, 0) + value
+        return merged
+
+    def render(self, merged: dict[str, dict[Labels, Any]]) -> str:
+        lines: list[str] = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(merged.get(name, {}).items()):
+                pairs = list(zip(metric.labelnames, labels, strict=True))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip((*metric.buckets, "+Inf"), value[:-1], strict=True):
+                        cumulative += count
+                        le = _labels([*pairs, ("le", str(bound))])
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                    lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+                else:
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _pool_gauge(key: str) -> Callable[[], dict[Labels, float]]:
+    def read() -> dict[Labels, float]:
+        value = pool_stats().get(key)
+        return {} if value is None else {(): value}
+
+    return read
+
+
+def _principal_cache_stat(key: str) -> Callable[[], dict[Labels, float]]:
+    def read() -> dict[Labels, float]:
+        # Imported here: app.auth imports this module for its security event counter.
+        from app.auth.cache import principal_cache
+
+        return {(): principal_cache.stats()[key]}
+
+    return read
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(
+    Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+)
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds", "HTTP request latency in seconds.", ("method", "route")
+    )
+)
+http_requests_in_progress = registry.register(
+    Gauge("http_requests_in_progress", "HTTP requests currently being handled.")
+)
+http_requests_in_progress.set(0)
+db_pool_checked_out = registry.register(
+    Gauge(
+        "db_pool_checked_out",
+        "Primary pool connections in use.",
+        function=_pool_gauge("checked_out"),
+    )
+)
+db_pool_overflow = registry.register(
+    Gauge(
+        "db_pool_overflow",
+        "Primary pool connections open beyond pool_size.",
+        function=_pool_gauge("overflow"),
+    )
+)
+rate_limit_rejections = registry.register(
+    Counter("rate_limit_rejections_total", "Requests rejected by auth rate limits.", ("path",))
+)
+principal_cache_hits = registry.register(
+    Counter(
+        "principal_cache_hits_total",
+        "Authenticated user lookups served from the principal cache.",
+        function=_principal_cache_stat("hits"),
+    )
+)
+principal_cache_misses = registry.register(
+    Counter(
+        "principal_cache_misses_total",
+        "Authenticated user lookups that missed the principal cache.",
+        function=_principal_cache_stat("misses"),
+    )
+)
+principal_cache_evictions = registry.register(
+    Counter(
+        "principal_cache_evictions_total",
+        "Principal cache entries evicted to stay within its size limit.",
+        function=_principal_cache_stat("evictions"),
+    )
+)
+principal_cache_entries = registry.register(
+    Gauge(
+        "principal_cache_entries",
+        "Users currently held in the principal cache.",
+        function=_principal_cache_stat("size"),
+    )
+)
+security_events = registry.register(
+    Counter("security_events_total", "Security events logged.", ("event",))
+)
+
+
+def _state_path(directory: Path, pid: int) -> Path:
+    return directory / f"{pid}.json"
+
+
+def write_state(directory: str | Path, state: dict[str, list[list[Any]]]) -> None:
+    """Write one worker's collected metrics to the shared directory, atomically."""
+    path = _state_path(Path(directory), os.getpid())
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    tmp.replace(path)
+
+
+def read_states(directory: str | Path, stale_after: float) -> list[tuple[dict, bool]]:
+    """Other workers' last written states, each with whether it is recent enough to be live."""
+    own = _state_path(Path(directory), os.getpid())
+    now = time.time()
+    states = []
+    for path in Path(directory).glob("*.json"):
+        if path == own:
+            continue
+        try:
+            live = now - path.stat().st_mtime < stale_after
+            states.append((json.loads(path.read_text()), live))
+        except (OSError, ValueError):
+            continue  # a worker replaced or removed it mid-read
+    return states
+
+
+async def render_metrics(app_settings: Settings | None = None) -> str:
+    """Prometheus text for this worker, merged with the other workers' when configured.
+
+    The registry is only read on the event loop thread that updates it; other
+    workers' files are read in a thread.
+    """
+    if app_settings is None:
+        app_settings = settings
+    states = [(registry.collect(), True)]
+    directory = app_settings.metrics_multiproc_dir
+    if directory:
+        stale_after = app_settings.metrics_flush_seconds * _STALE_INTERVALS
+        states.extend(await asyncio.to_thread(read_states, directory, stale_after))
+    return registry.render(registry.merge(states))
+
+
+@asynccontextmanager
+async def metrics_lifespan(app_settings: Settings | None = None) -> AsyncIterator[None]:
+    """Write this worker's state to the multiprocess directory for the app's lifetime."""
+    if app_settings is None:
+        app_settings = settings
+    directory = app_settings.metrics_multiproc_dir
+    if not directory:
+        yield
+        return
+    Path(directory).mkdir(parents=True, exist_ok=True)
+
+    async def flush_periodically() -> None:
+        while True:
+            await asyncio.sleep(app_settings.metrics_flush_seconds)
+            try:
+                await asyncio.to_thread(write_state, directory, registry.collect())
+            except OSError:
+                logger.exception("metrics.write_failed", directory=directory)
+
+    task = asyncio.create_task(flush_periodically(), name="metrics_flush")
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        write_state(directory, registry.collect())
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(
+    authorization: str = Header(default=""),
+    app_settings: Settings = Depends(get_settings),
+) -> PlainTextResponse:
+    """Prometheus scrape endpoint, served only to scrapers sending ``METRICS_TOKEN``."""
+    if not app_settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    expected = f"Bearer {app_settings.metrics_token}"
+    if not secrets.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"}
+        )
+    return PlainTextResponse(await render_metrics(app_settings), media_type=CONTENT_TYPE)
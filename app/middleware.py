@@ -0,0 +1,213 @@
+"""Pure-ASGI request pipeline.
+
+A single middleware handles request IDs, auth rate limits, security headers,
+request metrics and access logging in one pass, instead of stacking one ``BaseHTTPMiddleware``
+per concern (each of which spawns a task and re-wraps the response stream).
+Read-replica stickiness is a separate middleware that is inert without replicas.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+import uuid
+from collections.abc import Mapping
+
+import structlog
+from limits import RateLimitItem
+from slowapi import Limiter
+from starlette.requests import Request, cookie_parser
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import database
+from app.auth.security_logging import SecurityEvent, log_security_event
+from app.config import settings
+from app.metrics import (
+    http_request_duration,
+    http_requests,
+    http_requests_in_progress,
+    rate_limit_rejections,
+)
+
+logger = structlog.get_logger("app.request")
+
+# Encoded once at import; appended verbatim to every response.
+SECURITY_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"strict-transport-security", b"max-age=63072000; includeSubDomains"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"x-permitted-cross-domain-policies", b"none"),
+    (b"permissions-policy", b"camera=(), microphone=(), geolocation=()"),
+)
+
+
+def _get_header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestContextMiddleware:
+    """Assign request IDs, enforce auth rate limits, add security headers, record and log requests.
+
+    ``rate_limits`` maps a path to the limit applied to ``POST`` requests on
+    that path, keyed by client address.
+
+    Access logs are sampled: successful responses are logged with probability
+    ``sample_rate`` (never for ``exclude_paths``), while errors and requests
+    slower than ``slow_ms`` are always logged. Each line records the rate it
+    was kept at, so downstream counts can be rebuilt by weighting every line
+    by ``1 / sample_rate``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        limiter: Limiter,
+        rate_limits: Mapping[str, RateLimitItem],
+        sample_rate: float = 1.0,
+        slow_ms: float = math.inf,
+        exclude_paths: frozenset[str] = frozenset(),
+    ) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.rate_limits = rate_limits
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.slow_ms = slow_ms
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+
+        request_id = _get_header(scope, b"x-request-id") or str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+
+        response_headers = [*SECURITY_HEADERS, (b"x-request-id", request_id.encode("latin-1"))]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", ()), *response_headers]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            if method == "POST" and self._rate_limited(scope, path):
+                response = JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+                await response(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_progress.dec()
+            # Label by route template, never the raw path, to keep cardinality bounded.
+            route = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            http_requests.inc(method, route, str(status_code))
+            http_request_duration.observe(elapsed, method, route)
+
+            duration_ms = elapsed * 1000
+            sample_rate = self._sample_rate(path, status_code, duration_ms)
+            if sample_rate is not None:
+                logger.info(
+                    "request",
+                    method=method,
+                    path=path,
+                    status_code=status_code,
+                    duration_ms=round(duration_ms, 2),
+                    sample_rate=sample_rate,
+                )
+
+    def _sample_rate(self, path: str, status_code: int, duration_ms: float) -> float | None:
+        """The rate a request's access log line is kept at, or None to skip it."""
+        if status_code >= 400 or duration_ms >= self.slow_ms:
+            return 1.0
+        if path in self.exclude_paths:
+            return None
+        if self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            return self.sample_rate
+        return None
+
+    def _rate_limited(self, scope: Scope, path: str) -> bool:
+        rate_limit = self.rate_limits.get(path)
+        if rate_limit is None or not self.limiter.enabled:
+            return False
+        client = scope.get("client")
+        key = client[0] if client and client[0] else "127.0.0.1"
+        if self.limiter._limiter.hit(rate_limit, key):
+            return False
+        rate_limit_rejections.inc(path)
+        log_security_event(
+            SecurityEvent.RATE_LIMIT_HIT,
+            request=Request(scope),
+            detail=f"path={path}",
+        )
+        return True
+
+
+class ReadYourWritesMiddleware:
+    """Route a client's reads to the primary for a short window after it writes.
+
+    A successful non-safe request sets a cookie holding the end of the window
+    (``sticky_seconds`` from now); while it is valid, requests carry
+    ``state.read_from_primary = True`` for ``get_read_session``. Passes
+    requests straight through when no read replicas are configured.
+    """
+
+    cookie_name = "app_primary"
+    safe_methods = frozenset({"GET", "HEAD", "OPTIONS"})
+
+    def __init__(self, app: ASGIApp, *, sticky_seconds: float) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not database.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.time()
+        cookie = cookie_parser(_get_header(scope, b"cookie") or "").get(self.cookie_name)
+        try:
+            sticky = cookie is not None and float(cookie) > now
+        except ValueError:
+            sticky = False
+        scope.setdefault("state", {})["read_from_primary"] = sticky
+        if scope["method"] in self.safe_methods:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = [*message.get("headers", ()), self._set_cookie(now)]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _set_cookie(self, now: float) -> tuple[bytes, bytes]:
+        parts = [
+            f"{self.cookie_name}={now + self.sticky_seconds:.3f}",
+            f"Max-Age={math.ceil(self.sticky_seconds)}",
+            "Path=/",
+            "HttpOnly",
+            f"SameSite={settings.cookie_samesite}",
+        ]
+        if settings.cookie_domain:
+            parts.append(f"Domain={settings.cookie_domain}")
+        if not settings.is_development:
+            parts.append("Secure")
+        return b"set-cookie", "; ".join(parts).encode("latin-1")
@@ -1,13 +1,19 @@
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
 
 
+def _utcnow() -> datetime:
+    # Set client-side as well as by the server default so timestamps keep
+    # sub-second precision on every dialect; keyset pagination compares them.
+    return datetime.now(UTC)
+
+
 class Note(Base):
     """Simple note belonging to a user."""
 
@@ -17,17 +23,29 @@ class Note(Base):
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("user.id", ondelete="CASCADE"),
-        index=True,
         nullable=False,
     )
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     body: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), default=_utcnow, server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+        DateTime(timezone=True),
+        default=_utcnow,
+        server_default=func.now(),
+        onupdate=_utcnow,
+        nullable=False,
     )
 
     def __repr__(self) -> str:
         return f"<Note {self.title!r}>"
+
+
+# Serves GET /notes: one range scan per page for (user_id, created_at, id) keyset pagination.
+Index(
+    "ix_notes_user_id_created_at_id",
+    Note.user_id,
+    Note.created_at.desc(),
+    Note.id.desc(),
+)
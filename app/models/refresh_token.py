@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, func
+from sqlalchemy import DDL, Boolean, DateTime, ForeignKey, String, event, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -9,9 +9,22 @@ from app.database import Base
 
 
 class RefreshToken(Base):
+    """An issued refresh token.
+
+    On PostgreSQL the table is range-partitioned by ``expires_at`` into weekly
+    partitions (see ``app/auth/token_partitions.py``), so retention drops whole
+    expired partitions. The partition key must be part of the primary key.
+    Other databases get a plain table with the same columns.
+    """
+
     __tablename__ = "refresh_tokens"
+    __table_args__ = {"postgresql_partition_by": "RANGE (expires_at)"}
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Sentinel for bulk INSERT ... RETURNING: the composite key's timestamp can
+    # come back from the driver in a different form than it was sent.
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, insert_sentinel=True
+    )
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("user.id", ondelete="CASCADE"),
@@ -20,7 +33,23 @@ class RefreshToken(Base):
     )
     token_family: Mapped[str] = mapped_column(String, index=True, nullable=False)
     is_revoked: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, nullable=False
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
+    # Set when the token is rotated (not on family or logout revokes), so a request
+    # that lost a concurrent refresh race isn't mistaken for token reuse
+    replaced_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+# Catch-all partition so inserts never fail if partition maintenance falls behind
+# (create_all only; the migration creates the weekly partitions as well).
+event.listen(
+    RefreshToken.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS refresh_tokens_default PARTITION OF refresh_tokens DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
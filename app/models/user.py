@@ -1,14 +1,44 @@
-from fastapi_users.db import SQLAlchemyBaseUserTableUUID
-from sqlalchemy import String
+import uuid
+
+from sqlalchemy import CHAR, Boolean, String, TypeDecorator
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
 
 
-class User(SQLAlchemyBaseUserTableUUID, Base):
+class GUID(TypeDecorator):
+    """UUID column: native on PostgreSQL, a 36-character string elsewhere.
+
+    Same storage as FastAPI-Users' ``GUID``, which can't be imported without
+    loading FastAPI.
+    """
+
+    impl = CHAR
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(UUID())
+        return dialect.type_descriptor(CHAR(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        return str(value if isinstance(value, uuid.UUID) else uuid.UUID(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(value)
+
+
+class User(Base):
     """User model for authentication.
 
-    Inherits from FastAPI-Users base which provides:
+    Has the columns of FastAPI-Users' ``SQLAlchemyBaseUserTableUUID``, declared
+    here so that importing the models doesn't import FastAPI-Users (and with
+    it FastAPI):
     - id: UUID primary key
     - email: unique email address
     - hashed_password: bcrypt hashed password
@@ -17,6 +47,14 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     - is_verified: email verification status
     """
 
+    __tablename__ = "user"
+
+    id: Mapped[uuid.UUID] = mapped_column(GUID, primary_key=True, default=uuid.uuid4)
+    email: Mapped[str] = mapped_column(String(length=320), unique=True, index=True, nullable=False)
+    hashed_password: Mapped[str] = mapped_column(String(length=1024), nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    is_superuser: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    is_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     role: Mapped[str] = mapped_column(
         String(50), default="user", server_default="user", nullable=False
     )
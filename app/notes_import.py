@@ -0,0 +1,202 @@
+"""Streaming bulk import of notes from NDJSON or CSV request bodies.
+
+The body is decoded and parsed incrementally; valid rows are written in
+batches of ``IMPORT_BATCH_SIZE`` and the next chunk of the body is only read
+once the previous batch has been written, so a slow database pushes back on
+the client instead of the upload being buffered in memory. On PostgreSQL
+batches go through asyncpg's binary ``COPY``; other dialects fall back to
+chunked ``executemany`` inserts. The whole import is a single transaction.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+import uuid
+from collections.abc import AsyncIterator, Callable, Coroutine
+from datetime import UTC, datetime
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models.note import Note
+from app.schemas.note import NoteCreate
+
+# Valid rows written per COPY / executemany call.
+IMPORT_BATCH_SIZE = 1000
+# Per-line errors included in the response; the failure count is always exact.
+MAX_REPORTED_ERRORS = 100
+# Longest accepted line (or CSV record), in characters.
+MAX_LINE_LENGTH = 1 << 20
+
+# Columns written for each imported note, in COPY order.
+_COLUMNS = ("id", "user_id", "title", "body", "created_at", "updated_at")
+
+# (line number, parsed fields or None, error message or None)
+Record = tuple[int, dict[str, Any] | None, str | None]
+
+
+class ImportFormatError(ValueError):
+    """The request body cannot be parsed any further."""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode UTF-8 *chunks* and yield complete lines without their terminators."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line.removesuffix("\r")
+            if len(buffer) > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"Line exceeds {MAX_LINE_LENGTH} characters")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError("Body is not valid UTF-8") from None
+    if buffer:
+        yield buffer.removesuffix("\r")
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Yield one record per non-blank line of an NDJSON body."""
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_no, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, data, None
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """Yield one record per row of a CSV body whose first row is the header.
+
+    Quoted fields may span lines; a record is complete once its quotes balance.
+    Empty cells are treated as missing values.
+    """
+    header: list[str] | None = None
+    pending: list[str] = []
+    pending_length = quotes = 0
+    start_line = line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not pending:
+            start_line = line_no
+        pending.append(line)
+        pending_length += len(line) + 1
+        quotes += line.count('"')
+        if quotes % 2:
+            if pending_length > MAX_LINE_LENGTH:
+                raise ImportFormatError(f"Record exceeds {MAX_LINE_LENGTH} characters")
+            continue
+        text = "\n".join(pending)
+        pending.clear()
+        pending_length = quotes = 0
+        if not text.strip():
+            continue
+
+        row = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip().lstrip("\ufeff") for name in row]
+            continue
+        if len(row) != len(header):
+            yield start_line, None, f"Expected {len(header)} fields, got {len(row)}"
+            continue
+        yield start_line, {k: v for k, v in zip(header, row, strict=True) if v != ""}, None
+
+    if pending:
+        yield start_line, None, "Unterminated quoted field"
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def _copy_batch(connection: AsyncConnection, rows: list[dict[str, Any]]) -> None:
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Note.__tablename__,
+        records=[tuple(row[column] for column in _COLUMNS) for row in rows],
+        columns=list(_COLUMNS),
+    )
+
+
+async def _insert_batch(connection: AsyncConnection, rows: list[dict[str, Any]]) -> None:
+    await connection.execute(insert(Note), rows)
+
+
+async def import_notes(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    records: AsyncIterator[Record],
+) -> dict[str, Any]:
+    """Validate *records* against ``NoteCreate`` and insert the valid ones for *user_id*.
+
+    Returns row counts and the first ``MAX_REPORTED_ERRORS`` per-line errors.
+    Raises ``ImportFormatError`` (after rolling back) if the body is malformed.
+    """
+    connection = await session.connection()
+    write: Callable[[AsyncConnection, list[dict[str, Any]]], Coroutine[Any, Any, None]]
+    if connection.dialect.name == "postgresql":
+        # COPY goes straight to the driver; run a statement first so asyncpg's
+        # transaction is open and the COPY joins it.
+        await connection.exec_driver_sql("SELECT 1")
+        write = _copy_batch
+    else:
+        write = _insert_batch
+
+    imported = failed = 0
+    errors: list[dict[str, Any]] = []
+    batch: list[dict[str, Any]] = []
+    try:
+        async for line, data, error in records:
+            if error is None:
+                try:
+                    note = NoteCreate.model_validate(data)
+                except ValidationError as exc:
+                    error = _validation_message(exc)
+                else:
+                    # Timestamps are set here, per row, so both write paths store
+                    # the same values and rows keep their input order by created_at.
+                    now = datetime.now(UTC)
+                    batch.append(
+                        {
+                            "id": uuid.uuid4(),
+                            "user_id": user_id,
+                            **note.model_dump(),
+                            "created_at": now,
+                            "updated_at": now,
+                        }
+                    )
+            if error is not None:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"line": line, "error": error})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await write(connection, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            await write(connection, batch)
+            imported += len(batch)
+    except ImportFormatError:
+        await session.rollback()
+        raise
+
+    await session.commit()
+    return {"imported": imported, "failed": failed, "errors": errors}
@@ -0,0 +1,24 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key ``(created_at, id)`` of the last row on a page;
+the next page continues strictly after it. Clients must treat it as opaque.
+"""
+
+import base64
+from datetime import datetime
+from uuid import UUID
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{id.hex}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Return ``(created_at, id)`` from *cursor*; raise ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id_hex = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(hex=id_hex)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,135 @@
+"""Opt-in per-request SQL query profiler (``QUERY_PROFILER_ENABLED=true``).
+
+``install_query_profiler`` hooks an engine's cursor events and attributes
+each statement to the request in progress through a context variable set by
+``QueryProfilerMiddleware``. The middleware reports the totals in a
+``Server-Timing`` header (``db;dur=12.3;desc="4 queries"``) and logs a
+warning when one request runs the same statement more than a threshold
+number of times, the usual sign of an N+1 query.
+
+When the profiler is disabled neither the listeners nor the middleware are
+installed, so it costs nothing.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.logging import get_logger
+
+logger = get_logger("app.profiling")
+
+# Statement text shown in repeated-statement warnings is cut to this length.
+_STATEMENT_PREVIEW = 300
+
+
+@dataclass(slots=True)
+class QueryProfile:
+    """SQL statements run on behalf of one request."""
+
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_current_profile: ContextVar[QueryProfile | None] = ContextVar("query_profile", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_profile.get() is not None:
+        conn.info.setdefault("query_profiler_starts", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current_profile.get()
+    starts = conn.info.get("query_profiler_starts")
+    if profile is None or not starts:
+        return
+    profile.duration += time.perf_counter() - starts.pop()
+    profile.count += 1
+    # Parameters are bound separately, so the text is the statement's shape.
+    profile.statements[statement] += 1
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    conn = exception_context.connection
+    starts = conn.info.get("query_profiler_starts") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+_LISTENERS = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+    ("handle_error", _handle_error),
+)
+
+
+def install_query_profiler(engine: AsyncEngine) -> None:
+    """Attribute statements on *engine* to the request being profiled."""
+    target = engine.sync_engine
+    for name, listener in _LISTENERS:
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
+
+
+def remove_query_profiler(engine: AsyncEngine) -> None:
+    target = engine.sync_engine
+    for name, listener in _LISTENERS:
+        if event.contains(target, name, listener):
+            event.remove(target, name, listener)
+
+
+class QueryProfilerMiddleware:
+    """Profile each HTTP request's SQL and report it in ``Server-Timing``.
+
+    The header carries the statements run before the response started;
+    the repeated-statement check runs once the request has finished.
+    """
+
+    def __init__(self, app: ASGIApp, *, repeat_threshold: int) -> None:
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                header = (b"server-timing", profile.server_timing().encode("latin-1"))
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            self._warn_repeats(scope, profile)
+
+    def _warn_repeats(self, scope: Scope, profile: QueryProfile) -> None:
+        for statement, count in profile.statements.items():
+            if count > self.repeat_threshold:
+                logger.warning(
+                    "query_profiler.repeated_statement",
+                    method=scope["method"],
+                    path=scope["path"],
+                    count=count,
+                    total_queries=profile.count,
+                    statement=statement[:_STATEMENT_PREVIEW],
+                )
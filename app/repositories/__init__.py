@@ -0,0 +1,3 @@
+from app.repositories.notes import NoteRepository, get_note_repository, get_read_note_repository
+
+__all__ = ["NoteRepository", "get_note_repository", "get_read_note_repository"]
@@ -0,0 +1,207 @@
+"""Data access for notes, scoped to a single owner.
+
+Every statement filters on ``user_id``, and each write is one statement:
+``INSERT ... RETURNING``, ``UPDATE ... WHERE id AND user_id RETURNING`` and
+``DELETE ... WHERE id AND user_id RETURNING id``. A missing (or foreign)
+note comes back as ``None``/``False`` rather than needing a prior lookup.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import Principal, current_principal
+from app.database import get_async_session
+from app.deps import get_read_session
+from app.models.note import Note
+from app.schemas.note import NoteBatchCreate, NoteBatchDelete, NoteBatchOperation, NoteBatchUpdate
+
+
+@dataclass(slots=True)
+class BatchOutcome:
+    """Result of one batch operation; ``found`` is False for unknown or foreign notes."""
+
+    op: str
+    found: bool = False
+    note: Note | None = None
+
+
+class NoteRepository:
+    """Notes belonging to ``user_id``, read and written through ``session``."""
+
+    def __init__(self, session: AsyncSession, user_id: UUID) -> None:
+        self.session = session
+        self.user_id = user_id
+
+    async def list_page(self, *, after: tuple[datetime, UUID] | None, limit: int) -> Sequence[Note]:
+        """Return up to *limit* notes, newest first, strictly after the *after* sort key."""
+        query = select(Note).where(Note.user_id == self.user_id)
+        if after is not None:
+            query = query.where(tuple_(Note.created_at, Note.id) < after)
+        result = await self.session.scalars(
+            query.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit)
+        )
+        return result.all()
+
+    async def list_versions(
+        self, *, after: tuple[datetime, UUID] | None, limit: int
+    ) -> Sequence[tuple[UUID, datetime]]:
+        """``(id, updated_at)`` of the notes ``list_page`` would return, without loading them."""
+        query = select(Note.id, Note.updated_at).where(Note.user_id == self.user_id)
+        if after is not None:
+            query = query.where(tuple_(Note.created_at, Note.id) < after)
+        result = await self.session.execute(
+            query.order_by(Note.created_at.desc(), Note.id.desc()).limit(limit)
+        )
+        return result.tuples().all()
+
+    async def stream(self, batch_size: int) -> AsyncIterator[Sequence[Note]]:
+        """Yield all notes, newest first, *batch_size* at a time from a server-side cursor."""
+        result = await self.session.stream_scalars(
+            select(Note)
+            .where(Note.user_id == self.user_id)
+            .order_by(Note.created_at.desc(), Note.id.desc())
+            .execution_options(yield_per=batch_size)
+        )
+        async for notes in result.partitions():
+            yield notes
+
+    async def get(self, note_id: UUID) -> Note | None:
+        return await self.session.scalar(
+            select(Note).where(Note.id == note_id, Note.user_id == self.user_id)
+        )
+
+    async def get_version(self, note_id: UUID) -> datetime | None:
+        """``updated_at`` of the note, or None if it doesn't exist."""
+        return await self.session.scalar(
+            select(Note.updated_at).where(Note.id == note_id, Note.user_id == self.user_id)
+        )
+
+    async def create(self, values: dict[str, Any]) -> Note:
+        note = await self.session.scalar(
+            insert(Note).values(**values, user_id=self.user_id).returning(Note)
+        )
+        await self.session.commit()
+        return note
+
+    async def update(self, note_id: UUID, values: dict[str, Any]) -> Note | None:
+        """Apply *values* and return the updated note, or None if it doesn't exist."""
+        if not values:
+            return await self.get(note_id)
+        note = await self.session.scalar(
+            update(Note)
+            .where(Note.id == note_id, Note.user_id == self.user_id)
+            .values(**values)
+            .returning(Note)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return note
+
+    async def delete(self, note_id: UUID) -> bool:
+        """Delete the note and return whether it existed."""
+        deleted = await self.session.scalar(
+            delete(Note)
+            .where(Note.id == note_id, Note.user_id == self.user_id)
+            .returning(Note.id)
+            .execution_options(synchronize_session=False)
+        )
+        await self.session.commit()
+        return deleted is not None
+
+    async def apply_batch(self, operations: Sequence[NoteBatchOperation]) -> list[BatchOutcome]:
+        """Apply mixed operations in one transaction and return an outcome per operation.
+
+        Creates are one multi-row ``INSERT ... RETURNING``; updates run as one
+        ``executemany`` per distinct set of changed fields; deletes are one
+        ``DELETE ... WHERE id IN (...) RETURNING id``. The statement count
+        does not grow with the batch size.
+        """
+        outcomes = [BatchOutcome(op=op.op) for op in operations]
+        creates = [(i, op) for i, op in enumerate(operations) if isinstance(op, NoteBatchCreate)]
+        updates = [(i, op) for i, op in enumerate(operations) if isinstance(op, NoteBatchUpdate)]
+        deletes = [(i, op) for i, op in enumerate(operations) if isinstance(op, NoteBatchDelete)]
+
+        if creates:
+            created = await self.session.scalars(
+                insert(Note).returning(Note, sort_by_parameter_order=True),
+                [{**op.model_dump(exclude={"op"}), "user_id": self.user_id} for _, op in creates],
+            )
+            for (i, _), note in zip(creates, created.all(), strict=True):
+                outcomes[i] = BatchOutcome(op="create", found=True, note=note)
+
+        if updates:
+            notes_by_id = await self._update_many([op for _, op in updates])
+            for i, op in updates:
+                if op.id in notes_by_id:
+                    outcomes[i] = BatchOutcome(op="update", found=True, note=notes_by_id[op.id])
+
+        if deletes:
+            deleted = set(
+                await self.session.scalars(
+                    delete(Note)
+                    .where(Note.user_id == self.user_id, Note.id.in_([op.id for _, op in deletes]))
+                    .returning(Note.id)
+                    .execution_options(synchronize_session=False)
+                )
+            )
+            for i, op in deletes:
+                if op.id in deleted:
+                    outcomes[i] = BatchOutcome(op="delete", found=True)
+
+        await self.session.commit()
+        return outcomes
+
+    async def _update_many(self, updates: Sequence[NoteBatchUpdate]) -> dict[UUID, Note]:
+        owned = set(
+            await self.session.scalars(
+                select(Note.id).where(
+                    Note.user_id == self.user_id, Note.id.in_([op.id for op in updates])
+                )
+            )
+        )
+        # One executemany per distinct set of changed fields.
+        groups: dict[frozenset[str], list[dict[str, Any]]] = defaultdict(list)
+        for op in updates:
+            values = op.model_dump(exclude_unset=True, exclude={"op", "id"})
+            if op.id in owned and values:
+                groups[frozenset(values)].append(
+                    {"b_id": op.id, **{f"b_{key}": value for key, value in values.items()}}
+                )
+        table = Note.__table__
+        for fields, params in groups.items():
+            await self.session.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"), table.c.user_id == self.user_id)
+                .values({field: bindparam(f"b_{field}") for field in fields}),
+                params,
+            )
+        updated = await self.session.scalars(
+            select(Note).where(Note.id.in_(owned)).execution_options(populate_existing=True)
+        )
+        return {note.id: note for note in updated}
+
+
+async def get_note_repository(
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(current_principal),
+) -> NoteRepository:
+    """FastAPI dependency returning the current user's note repository."""
+    return NoteRepository(session, user.id)
+
+
+async def get_read_note_repository(
+    session: AsyncSession = Depends(get_read_session),
+    user: Principal = Depends(current_principal),
+) -> NoteRepository:
+    """Like ``get_note_repository``, but may read from a replica; for read-only routes."""
+    return NoteRepository(session, user.id)
@@ -4,8 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import database
+from app.auth.cache import principal_cache
+from app.auth.principal import Principal
 from app.auth.roles import UserRole, require_role
-from app.database import get_async_session
+from app.database import get_async_session, pool_stats
 from app.models.user import User
 from app.schemas.user import UserRead
 
@@ -21,7 +24,7 @@ async def update_user_role(
     user_id: UUID,
     body: RoleUpdate,
     session: AsyncSession = Depends(get_async_session),
-    _admin: User = Depends(require_role("admin")),
+    _admin: Principal = Depends(require_role("admin")),
 ):
     """Update a user's role. Requires admin role."""
     # Validate role value against enum
@@ -43,5 +46,15 @@ async def update_user_role(
 
     target.role = body.role
     await session.commit()
+    principal_cache.invalidate(target.id)
     await session.refresh(target)
     return target
+
+
+@router.get("/pool")
+async def get_pool_stats(_admin: Principal = Depends(require_role("admin"))):
+    """Connection pool counters for the worker serving this request. Requires admin role."""
+    stats = pool_stats()
+    if database.replicas:
+        stats["replicas"] = [pool_stats(replica) for replica in database.replicas.engines]
+    return stats
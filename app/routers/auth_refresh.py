@@ -2,6 +2,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, Cookie, Depends, Response
 from fastapi.responses import JSONResponse
+from fastapi_users.authentication import JWTStrategy
 from fastapi_users.jwt import decode_jwt
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -26,6 +27,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 async def refresh_access_token(
     app_refresh: str | None = Cookie(None),
     session: AsyncSession = Depends(get_async_session),
+    strategy: JWTStrategy = Depends(get_jwt_strategy),
 ):
     if not app_refresh:
         return JSONResponse(status_code=401, content={"detail": "Missing refresh token"})
@@ -52,7 +54,6 @@ async def refresh_access_token(
         return JSONResponse(status_code=401, content={"detail": "User not found"})
 
     # Generate new access token
-    strategy = get_jwt_strategy()
     access_token = await strategy.write_token(user)
 
     response = Response(status_code=204)
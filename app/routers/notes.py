@@ -1,94 +1,249 @@
+from collections.abc import Sequence
+from datetime import datetime
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import current_active_user
+from app.auth import Principal, current_principal
+from app.conditional import compute_etag, etag_matches, if_none_match, not_modified, set_validators
+from app.config import settings
 from app.database import get_async_session
 from app.models.note import Note
-from app.models.user import User
-from app.schemas.note import NoteCreate, NoteRead, NoteUpdate
+from app.notes_import import ImportFormatError, import_notes, parse_csv, parse_ndjson
+from app.pagination import decode_cursor, encode_cursor
+from app.repositories.notes import (
+    NoteRepository,
+    get_note_repository,
+    get_read_note_repository,
+)
+from app.schemas.note import (
+    NoteBatch,
+    NoteBatchResult,
+    NoteCreate,
+    NoteImportResult,
+    NotePage,
+    NoteRead,
+    NoteUpdate,
+)
+from app.serialization import FastJSONResponse, orm_dump
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
-@router.get("", response_model=list[NoteRead])
+# Rows fetched per round trip from the server-side cursor in GET /notes/export.
+EXPORT_BATCH_SIZE = 1000
+
+# Per-operation status of a successful batch operation.
+_BATCH_STATUS = {
+    "create": status.HTTP_201_CREATED,
+    "update": status.HTTP_200_OK,
+    "delete": status.HTTP_204_NO_CONTENT,
+}
+
+# Request content types accepted by POST /notes/import.
+_IMPORT_PARSERS = {
+    "application/x-ndjson": parse_ndjson,
+    "application/jsonl": parse_ndjson,
+    "text/csv": parse_csv,
+}
+
+
+_dump_notes = orm_dump(NoteRead)
+
+
+def _note_response(note: Note, response: Response, status_code: int = 200) -> Note | Response:
+    """Return *note* for ``response_model=NoteRead``; with FAST_JSON, serialize it directly."""
+    if not settings.fast_json:
+        return note
+    return FastJSONResponse(
+        _dump_notes([note])[0], status_code=status_code, headers=response.headers
+    )
+
+
+def _last_modified(versions: Sequence[tuple[UUID, datetime]]) -> datetime | None:
+    return max((updated_at for _, updated_at in versions), default=None)
+
+
+@router.get("", response_model=NotePage)
 async def list_notes(
-    session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user),
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    notes: NoteRepository = Depends(get_read_note_repository),
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
 ):
-    """List the current user's notes."""
-    result = await session.execute(
-        select(Note)
-        .where(Note.user_id == user.id)
-        .order_by(Note.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-    return result.scalars().all()
+    """List the current user's notes, newest first.
+
+    Pass the previous page's ``next_cursor`` as ``cursor`` to continue. Each
+    page is a single range scan of the (user_id, created_at, id) index.
+    Responses carry an ``ETag``; repeating the request with ``If-None-Match``
+    returns ``304`` after checking only note ids and timestamps.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+    tags = if_none_match(request)
+    if tags is not None:
+        versions = await notes.list_versions(after=after, limit=limit + 1)
+        etag = compute_etag(versions, limit)
+        if etag_matches(tags, etag):
+            return not_modified(etag, _last_modified(versions[:limit]))
+
+    page = await notes.list_page(after=after, limit=limit + 1)
+    versions = [(note.id, note.updated_at) for note in page]
+    set_validators(response, compute_etag(versions, limit), _last_modified(versions[:limit]))
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+    if settings.fast_json:
+        return FastJSONResponse(
+            {"items": _dump_notes(page), "next_cursor": next_cursor},
+            headers=response.headers,
+        )
+    return {"items": page, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_notes(notes: NoteRepository = Depends(get_read_note_repository)):
+    """Stream all of the current user's notes as NDJSON, newest first.
+
+    Rows are read through a server-side cursor ``EXPORT_BATCH_SIZE`` at a time
+    and written as they arrive, so memory use stays flat however many notes
+    the user has.
+    """
+
+    async def lines():
+        async for batch in notes.stream(EXPORT_BATCH_SIZE):
+            yield "".join(NoteRead.model_validate(note).model_dump_json() + "\n" for note in batch)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @router.get("/{note_id}", response_model=NoteRead)
 async def get_note(
     note_id: UUID,
-    session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user),
+    request: Request,
+    response: Response,
+    notes: NoteRepository = Depends(get_read_note_repository),
 ):
-    """Get a single note by ID (must belong to current user)."""
-    note = await session.get(Note, note_id)
-    if not note or note.user_id != user.id:
+    """Get a single note by ID (must belong to current user).
+
+    Supports ``If-None-Match``: a matching ``ETag`` returns ``304`` after
+    checking only the note's ``updated_at``.
+    """
+    tags = if_none_match(request)
+    if tags is not None:
+        updated_at = await notes.get_version(note_id)
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+        etag = compute_etag([(note_id, updated_at)])
+        if etag_matches(tags, etag):
+            return not_modified(etag, updated_at)
+
+    note = await notes.get(note_id)
+    if not note:
         raise HTTPException(status_code=404, detail="Note not found")
-    return note
+    set_validators(response, compute_etag([(note.id, note.updated_at)]), note.updated_at)
+    return _note_response(note, response)
 
 
 @router.post("", response_model=NoteRead, status_code=status.HTTP_201_CREATED)
 async def create_note(
     note_in: NoteCreate,
-    session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user),
+    response: Response,
+    notes: NoteRepository = Depends(get_note_repository),
 ):
     """Create a new note for the current user."""
-    note = Note(**note_in.model_dump(), user_id=user.id)
-    session.add(note)
-    await session.commit()
-    await session.refresh(note)
-    return note
+    note = await notes.create(note_in.model_dump())
+    return _note_response(note, response, status.HTTP_201_CREATED)
+
+
+@router.post("/batch", response_model=NoteBatchResult)
+async def batch_notes(batch: NoteBatch, notes: NoteRepository = Depends(get_note_repository)):
+    """Apply many create/update/delete operations in one transaction.
+
+    Creates are a multi-row ``INSERT ... RETURNING``; updates and deletes are
+    set-based statements scoped to the current user, so the number of round
+    trips does not grow with the batch. Results are returned in request
+    order; updates and deletes of notes the user doesn't own report 404.
+    """
+    outcomes = await notes.apply_batch(batch.operations)
+    return {
+        "results": [
+            {
+                "index": i,
+                "op": outcome.op,
+                "status": _BATCH_STATUS[outcome.op] if outcome.found else 404,
+                "note": outcome.note,
+            }
+            for i, outcome in enumerate(outcomes)
+        ]
+    }
+
+
+@router.post(
+    "/import",
+    response_model=NoteImportResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_notes_endpoint(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    user: Principal = Depends(current_principal),
+):
+    """Bulk-import notes from an NDJSON or CSV body (with a ``title,body`` header).
+
+    The body is streamed and parsed incrementally; invalid rows are skipped
+    and reported by line number, valid rows are inserted in one transaction.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = _IMPORT_PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be one of: {sorted(_IMPORT_PARSERS)}",
+        )
+    try:
+        return await import_notes(session, user.id, parser(request.stream()))
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from None
 
 
 @router.patch("/{note_id}", response_model=NoteRead)
 async def update_note(
     note_id: UUID,
     note_in: NoteUpdate,
-    session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user),
+    response: Response,
+    notes: NoteRepository = Depends(get_note_repository),
 ):
     """Update a note (must belong to current user)."""
-    note = await session.get(Note, note_id)
-    if not note or note.user_id != user.id:
+    note = await notes.update(note_id, note_in.model_dump(exclude_unset=True))
+    if not note:
         raise HTTPException(status_code=404, detail="Note not found")
-
-    update_data = note_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(note, field, value)
-
-    await session.commit()
-    await session.refresh(note)
-    return note
+    return _note_response(note, response)
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_note(
-    note_id: UUID,
-    session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user),
-):
+async def delete_note(note_id: UUID, notes: NoteRepository = Depends(get_note_repository)):
     """Delete a note (must belong to current user)."""
-    note = await session.get(Note, note_id)
-    if not note or note.user_id != user.id:
+    if not await notes.delete(note_id):
         raise HTTPException(status_code=404, detail="Note not found")
-
-    await session.delete(note)
-    await session.commit()
@@ -1,4 +1,21 @@
-from app.schemas.note import NoteCreate, NoteRead, NoteUpdate
+from app.schemas.note import (
+    NoteBatch,
+    NoteBatchResult,
+    NoteCreate,
+    NotePage,
+    NoteRead,
+    NoteUpdate,
+)
 from app.schemas.user import UserCreate, UserRead, UserUpdate
 
-__all__ = ["NoteCreate", "NoteRead", "NoteUpdate", "UserCreate", "UserRead", "UserUpdate"]
+__all__ = [
+    "NoteBatch",
+    "NoteBatchResult",
+    "NoteCreate",
+    "NotePage",
+    "NoteRead",
+    "NoteUpdate",
+    "UserCreate",
+    "UserRead",
+    "UserUpdate",
+]
@@ -1,7 +1,11 @@
 from datetime import datetime
+from typing import Annotated, Literal
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+# Upper bound on operations accepted by POST /notes/batch.
+MAX_BATCH_OPERATIONS = 500
 
 
 class NoteBase(BaseModel):
@@ -32,3 +36,82 @@ class NoteRead(NoteBase):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class NotePage(BaseModel):
+    """A page of notes, newest first, with the cursor for the next page."""
+
+    items: list[NoteRead]
+    next_cursor: str | None = Field(
+        None, description="Pass as `cursor` to fetch the next page; null on the last page."
+    )
+
+
+class NoteBatchCreate(NoteCreate):
+    """Batch operation creating a note."""
+
+    op: Literal["create"]
+
+
+class NoteBatchUpdate(NoteUpdate):
+    """Batch operation updating a note. Only the fields sent are changed."""
+
+    op: Literal["update"]
+    id: UUID
+
+
+class NoteBatchDelete(BaseModel):
+    """Batch operation deleting a note."""
+
+    op: Literal["delete"]
+    id: UUID
+
+
+NoteBatchOperation = Annotated[
+    NoteBatchCreate | NoteBatchUpdate | NoteBatchDelete, Field(discriminator="op")
+]
+
+
+class NoteBatch(BaseModel):
+    """Mixed create/update/delete operations applied in one transaction."""
+
+    operations: list[NoteBatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+    @model_validator(mode="after")
+    def validate_unique_ids(self) -> "NoteBatch":
+        ids = [op.id for op in self.operations if not isinstance(op, NoteBatchCreate)]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each note id may appear in at most one operation per batch")
+        return self
+
+
+class NoteBatchItemResult(BaseModel):
+    """Outcome of one batch operation, in request order."""
+
+    index: int
+    op: Literal["create", "update", "delete"]
+    status: int = Field(..., examples=[201])
+    note: NoteRead | None = None
+
+
+class NoteBatchResult(BaseModel):
+    """Per-operation results of a batch request."""
+
+    results: list[NoteBatchItemResult]
+
+
+class NoteImportError(BaseModel):
+    """A line of an import body that was skipped."""
+
+    line: int
+    error: str
+
+
+class NoteImportResult(BaseModel):
+    """Outcome of a bulk import."""
+
+    imported: int
+    failed: int
+    errors: list[NoteImportError] = Field(
+        ..., description="Per-line errors, truncated to the first 100; `failed` is exact."
+    )
@@ -0,0 +1,79 @@
+"""Opt-in fast JSON serialization (``FAST_JSON=true``).
+
+Two pieces:
+
+- ``FastJSONResponse`` renders with orjson when it is installed (pydantic-core
+  otherwise), instead of the stdlib ``json`` module.
+- ``orm_dump`` turns loaded ORM objects into plain dicts of a response
+  model's fields, validated and dumped by a cached pydantic-core
+  ``TypeAdapter`` from the objects' loaded state. Routes can return those
+  dicts in a ``FastJSONResponse`` and skip FastAPI's ``response_model`` pass,
+  which reads every field through SQLAlchemy's attribute instrumentation.
+
+Both produce byte-for-byte the same JSON as the default pydantic path for the
+types used here (UUIDs, ISO datetimes with ``Z`` for UTC).
+"""
+
+from __future__ import annotations
+
+import inspect
+from collections.abc import Callable, Iterable
+from functools import cache
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Newer FastAPI versions serialize ``response_model`` output straight to JSON
+# bytes with pydantic-core when the default response class is in use;
+# replacing the default class would switch that off.
+NATIVE_JSON_SERIALIZATION = "dump_json" in inspect.signature(serialize_response).parameters
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson (or pydantic-core) rather than ``json.dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def default_response_class(fast_json: bool) -> type[JSONResponse]:
+    """App-wide response class: ``FastJSONResponse`` when enabled and it is actually faster."""
+    if fast_json and not NATIVE_JSON_SERIALIZATION:
+        return FastJSONResponse
+    return JSONResponse
+
+
+@cache
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter[list[Any]]:
+    return TypeAdapter(list[model])
+
+
+def orm_dump(model: type[BaseModel]) -> Callable[[Iterable[Any]], list[dict[str, Any]]]:
+    """Return a function dumping ORM objects to dicts of *model*'s fields.
+
+    Validation and dumping run in pydantic-core through a cached
+    ``TypeAdapter``, over each object's loaded state (its ``__dict__``) rather
+    than its instrumented attributes. A field that is not loaded, such as an
+    expired attribute or a non-column property, fails validation instead of
+    being lazy-loaded.
+    """
+    adapter = _list_adapter(model)
+
+    def dump(objs: Iterable[Any]) -> list[dict[str, Any]]:
+        return adapter.dump_python(adapter.validate_python([obj.__dict__ for obj in objs]))
+
+    return dump
@@ -0,0 +1,224 @@
+"""Production server entry point: ``python -m app.serve``.
+
+Runs ``app.main:create_app`` under uvicorn with one worker process per CPU
+available to the container (``SERVE_WORKERS`` overrides), on uvloop and
+httptools when they are installed. Before starting the workers, the
+supervisor:
+
+- scales each worker's connection pool so the whole server stays within
+  ``DB_MAX_CONNECTIONS``, by exporting ``DB_POOL_SIZE``/``DB_MAX_OVERFLOW``
+  to the workers;
+- empties ``METRICS_MULTIPROC_DIR`` so merged metrics start from zero;
+- with ``SERVE_PRELOAD``, builds the app once. uvicorn spawns its workers
+  rather than forking them, so this does not share memory; it makes import
+  and configuration errors fail once, before any worker starts.
+
+Workers that exit are replaced, which is how ``SERVE_MAX_REQUESTS``
+recycling works; each worker draws its own ``SERVE_MAX_REQUESTS_JITTER``
+extra requests so they don't all restart at once. A stopping worker gets
+``SERVE_GRACEFUL_TIMEOUT_SECONDS`` to finish its in-flight requests.
+
+Written against the uvicorn release in ``uv.lock`` and later ones.
+"""
+
+from __future__ import annotations
+
+import inspect
+import math
+import os
+import random
+import sys
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.config import Settings
+from app.logging import get_logger, setup_logging
+
+logger = get_logger("app.serve")
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+# uvicorn's exit status for a server that failed to start (uvicorn.main or
+# uvicorn.config defines it, depending on the release).
+STARTUP_FAILURE = 3
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> float | None:
+    """CPUs granted by the cgroup (v2 or v1) CPU quota, or None when unlimited."""
+    try:
+        quota, period = (root / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus(cgroup_root: Path = CGROUP_ROOT) -> int:
+    """CPUs this process may run on, capped by the cgroup quota (rounded up)."""
+    if hasattr(os, "sched_getaffinity"):
+        count = len(os.sched_getaffinity(0))
+    else:
+        count = os.cpu_count() or 1
+    limit = cgroup_cpu_limit(cgroup_root)
+    if limit is not None:
+        count = min(count, max(1, math.ceil(limit)))
+    return count
+
+
+def split_pool(
+    max_connections: int, workers: int, pool_size: int, max_overflow: int
+) -> tuple[int, int]:
+    """Per-worker ``(pool_size, max_overflow)`` sharing *max_connections* among *workers*.
+
+    The configured size/overflow ratio is kept; every worker gets at least
+    one pooled connection.
+    """
+    per_worker = max(1, max_connections // workers)
+    size = max(1, per_worker * pool_size // max(pool_size + max_overflow, 1))
+    return size, per_worker - size
+
+
+@dataclass(frozen=True, slots=True)
+class ServePlan:
+    workers: int
+    pool_size: int
+    max_overflow: int
+    loop: str
+    http: str
+
+
+def plan(settings: Settings, cpus: int | None = None) -> ServePlan:
+    """Worker count, per-worker pool and event loop/HTTP implementations to run with."""
+    workers = settings.serve_workers or (cpus if cpus is not None else available_cpus())
+    pool_size, max_overflow = settings.db_pool_size, settings.db_max_overflow
+    if settings.db_max_connections > 0:
+        pool_size, max_overflow = split_pool(
+            settings.db_max_connections, workers, pool_size, max_overflow
+        )
+    return ServePlan(
+        workers=workers,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        loop="uvloop" if find_spec("uvloop") else "asyncio",
+        http="httptools" if find_spec("httptools") else "h11",
+    )
+
+
+def worker_environment(serve_plan: ServePlan) -> dict[str, str]:
+    """Environment variables that carry per-worker settings to the worker processes."""
+    return {
+        "DB_POOL_SIZE": str(serve_plan.pool_size),
+        "DB_MAX_OVERFLOW": str(serve_plan.max_overflow),
+    }
+
+
+class WorkerConfig(uvicorn.Config):
+    """uvicorn config giving each worker its own request limit.
+
+    Every worker process gets a copy of the config and loads it before
+    serving; loading adds up to *max_requests_jitter* requests to that copy's
+    ``limit_max_requests``, so workers (and their replacements) are recycled
+    at different times instead of all at once.
+    """
+
+    def __init__(self, *args: Any, max_requests_jitter: int = 0, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_requests_jitter = max_requests_jitter
+
+    def load(self) -> None:
+        if self.limit_max_requests is not None and not self.loaded:
+            self.limit_max_requests += random.randint(0, self.max_requests_jitter)
+        super().load()
+
+
+def build_config(settings: Settings, serve_plan: ServePlan) -> WorkerConfig:
+    """uvicorn configuration for *serve_plan*."""
+    return WorkerConfig(
+        "app.main:create_app",
+        factory=True,
+        host=settings.serve_host,
+        port=settings.serve_port,
+        workers=serve_plan.workers,
+        loop=serve_plan.loop,
+        http=serve_plan.http,
+        limit_max_requests=settings.serve_max_requests or None,
+        max_requests_jitter=settings.serve_max_requests_jitter,
+        timeout_graceful_shutdown=settings.serve_graceful_timeout_seconds,
+        # RequestContextMiddleware writes the access log.
+        access_log=False,
+    )
+
+
+def clear_metrics_dir(directory: str) -> None:
+    """Remove worker state files left by a previous run."""
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    for state in path.glob("*.json"):
+        state.unlink(missing_ok=True)
+
+
+def supervisor(config: uvicorn.Config, server: uvicorn.Server) -> Multiprocess:
+    """uvicorn's worker supervisor for *config*, listening on its socket."""
+    sockets = [config.bind_socket()]
+    # Older releases (including the locked one) run ``target`` in each worker;
+    # newer ones build each worker's server from the config themselves.
+    if "target" in inspect.signature(Multiprocess).parameters:
+        return Multiprocess(config, target=server.run, sockets=sockets)
+    return Multiprocess(config, sockets=sockets)
+
+
+def main() -> int:
+    from app.config import settings
+
+    setup_logging(settings)
+    serve_plan = plan(settings)
+    if settings.db_max_connections and serve_plan.workers > settings.db_max_connections:
+        logger.warning(
+            "serve.connections_oversubscribed",
+            workers=serve_plan.workers,
+            db_max_connections=settings.db_max_connections,
+        )
+    # Workers are spawned and read their settings afresh from the environment.
+    os.environ.update(worker_environment(serve_plan))
+    if settings.metrics_multiproc_dir:
+        clear_metrics_dir(settings.metrics_multiproc_dir)
+    if settings.serve_preload:
+        from app.main import create_app
+
+        create_app()
+    logger.info(
+        "serve.starting",
+        host=settings.serve_host,
+        port=settings.serve_port,
+        workers=serve_plan.workers,
+        pool_size=serve_plan.pool_size,
+        max_overflow=serve_plan.max_overflow,
+        loop=serve_plan.loop,
+        http=serve_plan.http,
+        max_requests=settings.serve_max_requests,
+        max_requests_jitter=settings.serve_max_requests_jitter,
+    )
+
+    config = build_config(settings, serve_plan)
+    server = uvicorn.Server(config)
+    # The supervisor also replaces workers that exit, so run a single worker
+    # under it too when workers are recycled.
+    if serve_plan.workers > 1 or settings.serve_max_requests:
+        supervisor(config, server).run()
+        return 0
+    server.run()
+    return 0 if server.started else STARTUP_FAILURE
+
+
+if __name__ == "__main__":
+    sys.exit(main())
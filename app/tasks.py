@@ -0,0 +1,112 @@
+"""Periodic background maintenance run inside the app lifespan."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+from app import database
+from app.auth.refresh import cleanup_expired_tokens
+from app.auth.token_partitions import maintain_partitions
+from app.config import Settings, settings
+from app.database import advisory_lock
+from app.features import get_feature_flags
+from app.logging import get_logger
+
+logger = get_logger("app.tasks")
+
+# pg advisory lock key held by the worker currently purging refresh tokens.
+REFRESH_TOKEN_PURGE_LOCK = 0x72_65_66_72  # "refr"
+
+
+async def purge_refresh_tokens(app_settings: Settings | None = None) -> int | None:
+    """Remove expired refresh tokens, unless another worker holds the lock.
+
+    On PostgreSQL this is partition maintenance: upcoming weekly partitions
+    are created and fully expired ones dropped. Elsewhere expired and revoked
+    rows are deleted in batches sized by *app_settings* (default: settings).
+    Returns rows removed (estimated when partitions are dropped), or None if
+    the run was skipped.
+    """
+    if app_settings is None:
+        app_settings = settings
+    async with advisory_lock(REFRESH_TOKEN_PURGE_LOCK) as acquired:
+        if not acquired:
+            logger.debug("refresh_token_purge.skipped", reason="lock held by another worker")
+            return None
+        start = time.perf_counter()
+        async with database.async_session_maker() as session:
+            connection = await session.connection()
+            if connection.dialect.name == "postgresql":
+                report = await maintain_partitions(connection)
+                await session.commit()
+                deleted = report.rows_dropped
+                details = {
+                    "partitions_created": report.created,
+                    "partitions_dropped": report.dropped,
+                }
+            else:
+                deleted = await cleanup_expired_tokens(
+                    session,
+                    batch_size=app_settings.refresh_token_purge_batch_size,
+                    pause=app_settings.refresh_token_purge_pause_seconds,
+                )
+                details = {}
+    logger.info(
+        "refresh_token_purge",
+        deleted=deleted,
+        duration_ms=round((time.perf_counter() - start) * 1000, 2),
+        **details,
+    )
+    return deleted
+
+
+async def reload_feature_flags() -> bool:
+    """Pick up changes to the feature flags file (stat and read off the event loop)."""
+    return await asyncio.to_thread(get_feature_flags().reload)
+
+
+async def run_periodically(
+    interval: float, job: Callable[..., Awaitable[object]], *args: object
+) -> None:
+    """Run ``job(*args)`` every *interval* seconds until cancelled; failures are logged, not raised."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job(*args)
+        except Exception:
+            logger.exception("periodic_task.failed", task=job.__name__)
+
+
+@asynccontextmanager
+async def background_tasks(app_settings: Settings | None = None) -> AsyncIterator[None]:
+    """Start the periodic maintenance tasks configured in *app_settings* and cancel them on exit."""
+    if app_settings is None:
+        app_settings = settings
+    tasks: list[asyncio.Task] = []
+    if app_settings.refresh_token_purge_interval_seconds > 0:
+        tasks.append(
+            asyncio.create_task(
+                run_periodically(
+                    app_settings.refresh_token_purge_interval_seconds,
+                    purge_refresh_tokens,
+                    app_settings,
+                ),
+                name="refresh_token_purge",
+            )
+        )
+    if app_settings.feature_flags_file and app_settings.feature_flags_reload_seconds > 0:
+        tasks.append(
+            asyncio.create_task(
+                run_periodically(app_settings.feature_flags_reload_seconds, reload_feature_flags),
+                name="feature_flags_reload",
+            )
+        )
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,34 +1,209 @@
-"""OpenTelemetry auto-instrumentation for FastAPI."""
+"""OpenTelemetry tracing and metrics for FastAPI and the database.
+
+When enabled, every request gets a server span with a child span per SQL
+statement, and a meter provider exports request duration histograms
+(recorded by the FastAPI instrumentation), database call counts and
+durations, and connection pool wait times.
+
+Traces are sampled with a parent-based ratio sampler, so a service honours
+an upstream sampling decision and samples ``OTEL_TRACES_SAMPLER_RATIO`` of
+the traces it starts itself. ``OTEL_EXPORTER`` selects OTLP/gRPC (a
+collector), ``console`` (stdout) or ``file`` (JSON lines appended to
+``OTEL_EXPORTER_FILE``); the last two need no collector.
+"""
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import time
+from typing import IO, TYPE_CHECKING, Any
 
-from app.config import settings
+from app.config import Settings, settings
 
 if TYPE_CHECKING:
     from fastapi import FastAPI
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import MetricExporter
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+    from opentelemetry.sdk.trace.sampling import Sampler
+    from sqlalchemy.ext.asyncio import AsyncEngine
 
 
-def setup_telemetry(app: FastAPI) -> None:
-    """Configure OpenTelemetry tracing when enabled via settings.
+def setup_telemetry(app: FastAPI, app_settings: Settings | None = None) -> None:
+    """Configure OpenTelemetry tracing and metrics when enabled in *app_settings*.
 
-    No-op when ``otel_enabled`` is False (the default).
+    *app_settings* defaults to settings. No-op when ``otel_enabled`` is False
+    (the default).
     """
-    if not settings.otel_enabled:
+    if app_settings is None:
+        app_settings = settings
+    if not app_settings.otel_enabled:
         return
 
-    from opentelemetry import trace
-    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    from opentelemetry import metrics, trace
     from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
     from opentelemetry.sdk.resources import Resource
     from opentelemetry.sdk.trace import TracerProvider
     from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
-    resource = Resource.create({"service.name": settings.otel_service_name})
-    provider = TracerProvider(resource=resource)
-    exporter = OTLPSpanExporter(endpoint=settings.otel_exporter_endpoint)
-    provider.add_span_processor(BatchSpanProcessor(exporter))
-    trace.set_tracer_provider(provider)
+    resource = Resource.create({"service.name": app_settings.otel_service_name})
+    span_exporter, metric_exporter = build_exporters(
+        app_settings.otel_exporter,
+        app_settings.otel_exporter_file,
+        endpoint=app_settings.otel_exporter_endpoint,
+    )
+
+    tracer_provider = TracerProvider(
+        resource=resource, sampler=build_sampler(app_settings.otel_traces_sampler_ratio)
+    )
+    tracer_provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(tracer_provider)
+
+    reader = PeriodicExportingMetricReader(
+        metric_exporter,
+        export_interval_millis=app_settings.otel_metric_export_interval_seconds * 1000,
+    )
+    meter_provider = MeterProvider(resource=resource, metric_readers=[reader])
+    metrics.set_meter_provider(meter_provider)
+
+    FastAPIInstrumentor.instrument_app(
+        app, tracer_provider=tracer_provider, meter_provider=meter_provider
+    )
+    # The engines are instrumented by instrument_database once the app starts.
+    app.state.otel_providers = (tracer_provider, meter_provider)
+
+
+def instrument_database(app: FastAPI) -> None:
+    """Instrument the database engines with the providers *app* was set up with.
+
+    Called from the lifespan after the engines are created; no-op when
+    ``setup_telemetry`` did not enable telemetry for *app*.
+    """
+    providers = getattr(app.state, "otel_providers", None)
+    if providers is None:
+        return
+
+    from app import database
+
+    for engine in (database.engine, *database.replicas.engines):
+        instrument_engine(engine, *providers)
+
+
+def build_sampler(ratio: float | None = None) -> Sampler:
+    """Parent-based sampler keeping *ratio* (default from settings) of new traces."""
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if ratio is None:
+        ratio = settings.otel_traces_sampler_ratio
+    return ParentBased(TraceIdRatioBased(ratio))
+
+
+def build_exporters(
+    kind: str | None = None, path: str | None = None, *, endpoint: str | None = None
+) -> tuple[SpanExporter, MetricExporter]:
+    """Span and metric exporters for ``otlp``, ``console`` or ``file`` output."""
+    kind = kind or settings.otel_exporter
+    if kind == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        endpoint = endpoint or settings.otel_exporter_endpoint
+        return OTLPSpanExporter(endpoint=endpoint), OTLPMetricExporter(endpoint=endpoint)
+
+    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    if kind == "console":
+        return ConsoleSpanExporter(), ConsoleMetricExporter()
+    if kind == "file":
+        # One JSON document per line; kept open for the life of the process.
+        out: IO[str] = open(path or settings.otel_exporter_file, "a", encoding="utf-8")
+        return (
+            ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n"),
+            ConsoleMetricExporter(out=out, formatter=lambda data: data.to_json(indent=None) + "\n"),
+        )
+    raise ValueError(f"Unknown OTEL_EXPORTER {kind!r}; expected otlp, console or file")
+
+
+def instrument_engine(
+    engine: AsyncEngine,
+    tracer_provider: TracerProvider | None = None,
+    meter_provider: MeterProvider | None = None,
+) -> None:
+    """Trace every SQL statement on *engine* and record database metrics.
+
+    Statement spans are children of whatever span is current (the request
+    span, under FastAPI). Pool wait time is recorded when the engine uses
+    ``InstrumentedQueuePool``, whose waits only count checkouts that found
+    the pool exhausted.
+    """
+    from opentelemetry import metrics, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from sqlalchemy import event
+
+    from app.database import InstrumentedQueuePool
+
+    tracer = trace.get_tracer("app.database", tracer_provider=tracer_provider)
+    meter = metrics.get_meter("app.database", meter_provider=meter_provider)
+    calls = meter.create_counter(
+        "db.client.calls", unit="{call}", description="SQL statements executed."
+    )
+    duration = meter.create_histogram(
+        "db.client.operation.duration", unit="s", description="SQL statement duration."
+    )
+    pool_wait = meter.create_histogram(
+        "db.client.connection.wait_time",
+        unit="s",
+        description="Time spent waiting for a connection from an exhausted pool.",
+    )
+
+    sync_engine = engine.sync_engine
+    url = sync_engine.url
+    base_attributes: dict[str, Any] = {"db.system": sync_engine.dialect.name}
+    if url.database:
+        base_attributes["db.name"] = url.database
+    if url.host:
+        base_attributes["server.address"] = url.host
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_span(conn, cursor, statement, parameters, context, executemany) -> None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        span = tracer.start_span(
+            operation,
+            kind=SpanKind.CLIENT,
+            attributes={
+                **base_attributes,
+                "db.operation": operation,
+                "db.statement": statement,
+            },
+        )
+        conn.info.setdefault("otel_spans", []).append((span, operation, time.perf_counter()))
+
+    def _finish(conn, error: BaseException | None) -> None:
+        spans = conn.info.get("otel_spans")
+        if not spans:
+            return
+        span, operation, start = spans.pop()
+        attributes = {**base_attributes, "db.operation": operation}
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, type(error).__name__))
+            attributes["error.type"] = type(error).__name__
+        span.end()
+        calls.add(1, attributes)
+        duration.record(time.perf_counter() - start, attributes)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end_span(conn, cursor, statement, parameters, context, executemany) -> None:
+        _finish(conn, None)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _fail_span(exception_context) -> None:
+        if exception_context.connection is not None:
+            _finish(exception_context.connection, exception_context.original_exception)
 
-    FastAPIInstrumentor.instrument_app(app)
+    pool = sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.on_wait = lambda seconds: pool_wait.record(seconds, base_attributes)
@@ -0,0 +1,114 @@
+"""Analytics throughput: per-event delivery vs ``BatchingAnalyticsBackend``.
+
+A vendor backend that sends every event itself makes the caller wait one
+round trip per ``track``. This simulates such a sink (``--latency-ms`` per
+call) and compares the time a request handler spends per event when
+delivering inline, when logging via ``LogAnalyticsBackend``, and when
+enqueueing into ``BatchingAnalyticsBackend``, plus the end-to-end rate at
+which the batching backend drains to the simulated sink and to an NDJSON
+file.
+
+Run with ``uv run python -m benchmarks.analytics [--events 20000] [--latency-ms 2]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+# Render log lines but discard them, so LogAnalyticsBackend pays its rendering cost without I/O.
+structlog.configure(
+    processors=[structlog.processors.JSONRenderer()],
+    logger_factory=structlog.ReturnLoggerFactory(),
+    cache_logger_on_first_use=True,
+)
+
+from app.analytics import (  # noqa: E402
+    AnalyticsBackend,
+    BatchingAnalyticsBackend,
+    LogAnalyticsBackend,
+    NDJSONFileSink,
+)
+
+PROPERTIES = {"note_id": "3f0c6f5e-8a52-4c52-9d7e-0d6c4a0b2f11", "source": "web"}
+
+
+class SimulatedHTTPSink:
+    """Sink that costs one network round trip per call, whatever the batch size."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    async def send(self, events: list[dict[str, Any]]) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+
+async def inline_delivery(events: int, latency: float) -> float:
+    """Microseconds per event when each ``track`` awaits its own delivery."""
+    sink = SimulatedHTTPSink(latency)
+    start = time.perf_counter()
+    for _ in range(events):
+        await sink.send([{"type": "track", "event": "note.created", "properties": PROPERTIES}])
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def caller_cost(backend: AnalyticsBackend, events: int) -> float:
+    """Microseconds per ``track`` call as seen by the caller."""
+    start = time.perf_counter()
+    for _ in range(events):
+        backend.track("note.created", properties=PROPERTIES, user_id="user-1")
+    return (time.perf_counter() - start) / events * 1e6
+
+
+async def batched(sink: Any, events: int, batch_size: int) -> tuple[float, float]:
+    """Caller cost per event and end-to-end events/s through the batching backend."""
+    backend = BatchingAnalyticsBackend(
+        sink, batch_size=batch_size, flush_interval=0.05, max_buffer=events
+    )
+    backend.start()
+    start = time.perf_counter()
+    per_event = caller_cost(backend, events)
+    await backend.stop()
+    elapsed = time.perf_counter() - start
+    stats = backend.stats()
+    if stats["sent"] != events:
+        raise SystemExit(f"batching backend lost events: {stats}")
+    return per_event, events / elapsed
+
+
+async def main(events: int, latency_ms: float, batch_size: int) -> None:
+    latency = latency_ms / 1000
+    inline_events = min(events, 500)
+    print(f"{events} events, simulated sink latency {latency_ms}ms, batch size {batch_size}\n")
+    print(f"{'backend':<40}{'caller us/event':>16}{'events/s':>12}")
+
+    inline = await inline_delivery(inline_events, latency)
+    print(f"{'inline delivery (one call per event)':<40}{inline:>16.1f}{1e6 / inline:>12.0f}")
+
+    logged = caller_cost(LogAnalyticsBackend(), events)
+    print(f"{'LogAnalyticsBackend':<40}{logged:>16.1f}{1e6 / logged:>12.0f}")
+
+    per_event, rate = await batched(SimulatedHTTPSink(latency), events, batch_size)
+    print(f"{'BatchingAnalyticsBackend -> HTTP sink':<40}{per_event:>16.1f}{rate:>12.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = NDJSONFileSink(Path(tmp) / "events.ndjson")
+        per_event, rate = await batched(sink, events, batch_size)
+    print(f"{'BatchingAnalyticsBackend -> NDJSON file':<40}{per_event:>16.1f}{rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.events, args.latency_ms, args.batch_size))
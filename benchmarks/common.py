@@ -0,0 +1,82 @@
+"""Shared setup for benchmarks that drive the full app in-process."""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from uuid import uuid4
+
+from fastapi_users.password import PasswordHelper
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.auth import current_active_user
+from app.database import Base, get_async_session
+from app.main import app
+from app.models.user import User
+
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+@asynccontextmanager
+async def bench_client(
+    database_url: str | None = None, *, authenticate: bool = True
+) -> AsyncIterator[AsyncClient]:
+    """Yield a client for ``app.main:app`` backed by a fresh database.
+
+    Defaults to a temporary SQLite file. With *authenticate*, the client acts
+    as a seeded user through a dependency override, so auth cost is
+    excluded; either way that user can log in with
+    ``BENCH_EMAIL``/``BENCH_PASSWORD``.
+    """
+    logging.disable(logging.INFO)
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_async_engine(database_url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    user = User(
+        id=uuid4(), email=BENCH_EMAIL, hashed_password=PasswordHelper().hash(BENCH_PASSWORD)
+    )
+    async with session_maker() as session:
+        session.add(user)
+        await session.commit()
+
+    async def override_get_async_session() -> AsyncIterator[AsyncSession]:
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_get_async_session
+    if authenticate:
+        app.dependency_overrides[current_active_user] = lambda: user
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+class Timer:
+    """Context manager recording elapsed wall time in ``seconds``."""
+
+    def __enter__(self) -> Timer:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.seconds = time.perf_counter() - self.start
@@ -0,0 +1,160 @@
+"""Per-request overhead of the request middleware pipeline.
+
+Compares the four ``@app.middleware("http")`` layers the app used to stack
+against the single pure-ASGI ``RequestContextMiddleware``, by calling each
+ASGI app directly (no HTTP client, no server) and subtracting the cost of
+the bare endpoint.
+
+Run with ``uv run python -m benchmarks.middleware [--requests 20000]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import structlog
+from limits import parse
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+# Render log lines but discard them, so both pipelines pay the same logging cost without I/O.
+structlog.configure(
+    processors=[structlog.contextvars.merge_contextvars, structlog.processors.JSONRenderer()],
+    logger_factory=structlog.ReturnLoggerFactory(),
+    cache_logger_on_first_use=True,
+)
+
+from app.middleware import RequestContextMiddleware  # noqa: E402
+
+RATE_LIMITS = {"/auth/jwt/login": parse("5/minute")}
+log = structlog.get_logger("bench.request")
+
+
+async def endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse("ok")
+
+
+def bare_app() -> Starlette:
+    return Starlette(routes=[Route("/notes", endpoint)])
+
+
+def legacy_app() -> Starlette:
+    """The four BaseHTTPMiddleware layers as previously registered in app/main.py."""
+    app = bare_app()
+    limiter = Limiter(key_func=get_remote_address)
+
+    async def rate_limit_auth(request, call_next):
+        rate_limit = RATE_LIMITS.get(request.url.path)
+        if rate_limit and request.method == "POST":
+            if not limiter._limiter.hit(rate_limit, get_remote_address(request)):
+                return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+        return await call_next(request)
+
+    async def add_security_headers(request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
+        response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
+        return response
+
+    async def request_id_middleware(request, call_next):
+        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        request.state.request_id = request_id
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+    async def request_logging_middleware(request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        log.info(
+            "request",
+            method=request.method,
+            path=request.url.path,
+            status_code=response.status_code,
+            duration_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        return response
+
+    for dispatch in (
+        rate_limit_auth,
+        add_security_headers,
+        request_id_middleware,
+        request_logging_middleware,
+    ):
+        app.add_middleware(BaseHTTPMiddleware, dispatch=dispatch)
+    return app
+
+
+def pipeline_app() -> Starlette:
+    app = bare_app()
+    limiter = Limiter(key_func=get_remote_address)
+    app.add_middleware(RequestContextMiddleware, limiter=limiter, rate_limits=RATE_LIMITS)
+    return app
+
+
+async def measure(app, requests: int) -> float:
+    """Return mean microseconds per request for *app*."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/notes",
+        "raw_path": b"/notes",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(min(1000, requests)):
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main(requests: int) -> None:
+    bare = await measure(bare_app(), requests)
+    legacy = await measure(legacy_app(), requests)
+    pipeline = await measure(pipeline_app(), requests)
+
+    print(f"{'app':<28}{'us/request':>12}{'overhead us':>14}")
+    for name, value in (
+        ("bare endpoint", bare),
+        ("4x BaseHTTPMiddleware", legacy),
+        ("RequestContextMiddleware", pipeline),
+    ):
+        print(f"{name:<28}{value:>12.1f}{value - bare:>14.1f}")
+    print(f"\nmiddleware overhead reduced {(legacy - bare) / max(pipeline - bare, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,64 @@
+"""Single-note endpoints vs ``POST /notes/batch`` for syncing many notes.
+
+Run with ``uv run python -m benchmarks.notes_batch [--notes 500] [--database-url URL]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from app.schemas.note import MAX_BATCH_OPERATIONS
+from benchmarks.common import Timer, bench_client
+
+
+def chunks(items: list, size: int) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+async def main(notes: int, database_url: str | None) -> None:
+    async with bench_client(database_url) as client:
+        with Timer() as single_create:
+            ids = []
+            for i in range(notes):
+                response = await client.post("/notes", json={"title": f"note {i}"})
+                ids.append(response.json()["id"])
+        with Timer() as single_update:
+            for note_id in ids:
+                await client.patch(f"/notes/{note_id}", json={"title": "updated"})
+        with Timer() as single_delete:
+            for note_id in ids:
+                await client.delete(f"/notes/{note_id}")
+
+        async def batch(operations: list[dict]) -> list[dict]:
+            results = []
+            for chunk in chunks(operations, MAX_BATCH_OPERATIONS):
+                response = await client.post("/notes/batch", json={"operations": chunk})
+                results += response.json()["results"]
+            return results
+
+        with Timer() as batch_create:
+            created = await batch([{"op": "create", "title": f"note {i}"} for i in range(notes)])
+        ids = [result["note"]["id"] for result in created]
+        with Timer() as batch_update:
+            await batch([{"op": "update", "id": i, "title": "updated"} for i in ids])
+        with Timer() as batch_delete:
+            await batch([{"op": "delete", "id": i} for i in ids])
+
+    rows = [
+        ("create", single_create.seconds, batch_create.seconds),
+        ("update", single_update.seconds, batch_update.seconds),
+        ("delete", single_delete.seconds, batch_delete.seconds),
+    ]
+    print(f"{notes} notes")
+    print(f"{'operation':<12}{'single (s)':>12}{'batch (s)':>12}{'speedup':>10}")
+    for name, single, batched in rows:
+        print(f"{name:<12}{single:>12.3f}{batched:>12.3f}{single / batched:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.database_url))
@@ -0,0 +1,70 @@
+"""Refresh-token rotation throughput through ``POST /auth/refresh``.
+
+Logs in once per chain, then each chain repeatedly trades its refresh token
+for the next one. Chains run concurrently, so this measures rotation under
+contention as well as per-refresh latency.
+
+Run with ``uv run python -m benchmarks.refresh [--refreshes 500] [--chains 4] [--database-url URL]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from httpx import AsyncClient
+
+from app.auth.refresh import REFRESH_COOKIE_NAME
+from app.main import app
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, Timer, bench_client
+
+
+async def login(client: AsyncClient) -> str:
+    response = await client.post(
+        "/auth/jwt/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    return response.cookies[REFRESH_COOKIE_NAME]
+
+
+async def chain(client: AsyncClient, token: str, refreshes: int) -> list[float]:
+    latencies = []
+    for _ in range(refreshes):
+        start = time.perf_counter()
+        response = await client.post(
+            "/auth/refresh", headers={"Cookie": f"{REFRESH_COOKIE_NAME}={token}"}
+        )
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 204:
+            raise RuntimeError(f"refresh failed: {response.status_code} {response.text}")
+        token = response.cookies[REFRESH_COOKIE_NAME]
+    return latencies
+
+
+async def main(refreshes: int, chains: int, database_url: str | None) -> None:
+    # Auth endpoints are rate limited per client address; the benchmark is one client.
+    app.state.limiter.enabled = False
+    async with bench_client(database_url) as client:
+        tokens = [await login(client) for _ in range(chains)]
+        await chain(client, tokens[0], min(20, refreshes))  # warm up
+        tokens[0] = await login(client)
+        with Timer() as total:
+            results = await asyncio.gather(*(chain(client, t, refreshes) for t in tokens))
+
+    latencies = sorted(value for result in results for value in result)
+    count = len(latencies)
+    print(f"{count} refreshes across {chains} concurrent chains")
+    print(f"throughput  {count / total.seconds:>10.1f} refreshes/s")
+    print(f"mean        {statistics.fmean(latencies) * 1000:>10.2f} ms")
+    print(f"p95         {latencies[int(count * 0.95) - 1] * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--refreshes", type=int, default=500, help="refreshes per chain")
+    parser.add_argument("--chains", type=int, default=4)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    asyncio.run(main(args.refreshes, args.chains, args.database_url))
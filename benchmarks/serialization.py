@@ -0,0 +1,118 @@
+"""Serializing a 100-note page: response_model validation vs the FAST_JSON path.
+
+Each variant is a route returning the same ORM ``Note`` objects, called as an
+ASGI app directly (no database, no HTTP client), so the difference is purely
+validation and JSON encoding.
+
+Run with ``uv run python -m benchmarks.serialization [--notes 100] [--requests 2000]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from fastapi import FastAPI
+
+from app.models.note import Note
+from app.schemas.note import NotePage, NoteRead
+from app.serialization import NATIVE_JSON_SERIALIZATION, FastJSONResponse, orjson, orm_dump
+
+
+def make_notes(count: int) -> list[Note]:
+    now = datetime.now(UTC)
+    user_id = uuid.uuid4()
+    return [
+        Note(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            title=f"Note {i}",
+            body="Lorem ipsum dolor sit amet. " * 8,
+            created_at=now - timedelta(seconds=i),
+            updated_at=now - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def build_app(notes: list[Note]) -> FastAPI:
+    app = FastAPI()
+    dump_notes = orm_dump(NoteRead)
+
+    @app.get("/response-model", response_model=NotePage)
+    async def response_model():
+        return {"items": notes, "next_cursor": None}
+
+    @app.get("/response-model-fast-class", response_model=NotePage, response_class=FastJSONResponse)
+    async def response_model_fast_class():
+        return {"items": notes, "next_cursor": None}
+
+    @app.get("/orm-dump", response_model=NotePage)
+    async def orm_dump_route():
+        return FastJSONResponse({"items": dump_notes(notes), "next_cursor": None})
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> tuple[float, bytes]:
+    """Return mean microseconds per request and the last response body."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message["body"])
+
+    for _ in range(min(200, requests)):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6, body[-1]
+
+
+async def main(notes: int, requests: int) -> None:
+    app = build_app(make_notes(notes))
+    print(f"{notes} notes per response; encoder: {'orjson' if orjson else 'pydantic-core'}")
+    print(f"FastAPI native JSON serialization: {NATIVE_JSON_SERIALIZATION}\n")
+    print(f"{'path':<44}{'us/response':>12}")
+    results = {}
+    for name, path in (
+        ("response_model (validate + default encode)", "/response-model"),
+        ("response_model + FastJSONResponse", "/response-model-fast-class"),
+        ("orm_dump + FastJSONResponse (FAST_JSON)", "/orm-dump"),
+    ):
+        results[path], body = await measure(app, path, requests)
+        print(f"{name:<44}{results[path]:>12.1f}")
+        if path == "/response-model":
+            expected = body
+        elif body != expected:
+            raise SystemExit(f"{path} produced different JSON")
+    print(f"\nFAST_JSON speedup: {results['/response-model'] / results['/orm-dump']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.notes, args.requests))
@@ -0,0 +1,163 @@
+"""Worker startup time: imports, app assembly and lifespan startup.
+
+Each stage runs in a fresh interpreter (``--runs`` times, median reported),
+timed from before its first import, so it counts everything a new worker,
+test run or Alembic command pays on top of interpreter startup:
+
+- ``import``: ``import app.main``
+- ``create_app``: ... then ``create_app()``
+- ``startup``: ... then the lifespan's startup (engines, flags, tasks)
+- ``models``: ``import app.models``, all that Alembic loads
+
+The run fails if ``models`` loads FastAPI or is not faster than
+``create_app``: Alembic and other tools must not pay for the web stack.
+
+``--top N`` also lists the N slowest imports under ``-X importtime`` for the
+full startup. ``--save-baseline``/``--baseline``/``--tolerance`` work as in
+``benchmarks.suite``, failing when a stage gets slower.
+
+Run with ``uv run python -m benchmarks.startup [--runs 7] [--top 15]
+[--baseline FILE | --save-baseline FILE]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+_STARTUP = """
+import asyncio
+from app.main import create_app
+app = create_app()
+async def serve():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()  # ready to serve
+elapsed = asyncio.run(serve()) - start
+"""
+
+STAGES = {
+    "import": "import app.main\nelapsed = time.perf_counter() - start",
+    "create_app": "from app.main import create_app\ncreate_app()\n"
+    "elapsed = time.perf_counter() - start",
+    "startup": _STARTUP,
+    "models": "import app.models\nelapsed = time.perf_counter() - start",
+}
+
+
+def _script(code: str) -> str:
+    return f"import time\nstart = time.perf_counter()\n{code}\nprint('elapsed', elapsed)"
+
+
+def measure(code: str) -> float:
+    """Seconds taken by *code* (which sets ``elapsed``) in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", _script(code)], check=True, capture_output=True, text=True
+    ).stdout
+    # The app may log to stdout too; find the line this script printed.
+    return next(
+        float(line.split()[1]) for line in output.splitlines() if line.startswith("elapsed ")
+    )
+
+
+def slowest_imports(code: str, top: int) -> list[tuple[str, float]]:
+    """Top-level modules imported by *code*, by cumulative import time in ms."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _script(code)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # the header, or something else on stderr
+        _, cumulative, name = fields
+        # Nesting is shown by indentation; only count modules imported directly.
+        if not name.startswith("  "):
+            modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda module: module[1], reverse=True)[:top]
+
+
+def models_stage_problems(results: dict[str, float]) -> list[str]:
+    """Ways the ``models`` stage pulls in the web stack, if any."""
+    problems = []
+    if results["models"] >= results["create_app"]:
+        problems.append(
+            f"models ({results['models']:.1f}ms) is no faster than "
+            f"create_app ({results['create_app']:.1f}ms)"
+        )
+    loaded = subprocess.run(
+        [sys.executable, "-c", "import sys, app.models\nprint('fastapi' in sys.modules)"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()[-1]
+    if loaded == "True":
+        problems.append("importing app.models loads FastAPI")
+    return problems
+
+
+def compare(results: dict[str, float], baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of *results* (ms) against a saved *baseline*."""
+    regressions = []
+    for stage, ms in results.items():
+        base = baseline["results"].get(stage)
+        if base is not None and ms > base * (1 + tolerance):
+            regressions.append(f"{stage}: {ms:.1f}ms vs baseline {base:.1f}ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7, help="interpreters per stage")
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports")
+    parser.add_argument("--baseline", type=Path, help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", type=Path, help="write results to this file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed regression (default 0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+
+    results: dict[str, float] = {}
+    print(f"{'stage':<12}{'median ms':>10}{'min ms':>10}")
+    for stage, code in STAGES.items():
+        samples = [measure(code) * 1000 for _ in range(args.runs)]
+        results[stage] = round(statistics.median(samples), 1)
+        print(f"{stage:<12}{results[stage]:>10.1f}{min(samples):>10.1f}")
+
+    problems = models_stage_problems(results)
+    for problem in problems:
+        print(f"\n{problem}")
+
+    if args.top:
+        print("\nslowest imports during startup (cumulative ms, -X importtime):")
+        for name, ms in slowest_imports(STAGES["startup"], args.top):
+            print(f"  {ms:>8.1f}  {name}")
+
+    if args.save_baseline:
+        document = {
+            "meta": {"python": platform.python_version(), "machine": platform.node()},
+            "results": results,
+        }
+        args.save_baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nbaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\nregressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Throughput and latency of the API's hot paths, with a regression check.
+
+Drives ``app.main:app`` in-process through ``httpx.ASGITransport`` with real
+cookie authentication, against a freshly seeded database (a temporary
+SQLite file by default, or ``--database-url``). Each scenario runs its
+requests from ``--concurrency`` workers and reports requests/s and
+p50/p95/p99 latency.
+
+``--save-baseline FILE`` stores the results as JSON; ``--baseline FILE``
+compares against them and exits with status 1 if any scenario's throughput
+drops, or its p95 latency rises, by more than ``--tolerance``. Baselines
+are only comparable on the same machine and database.
+
+Run with ``uv run python -m benchmarks.suite [--requests 500] [--concurrency 4]
+[--baseline FILE | --save-baseline FILE] [--database-url URL]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from httpx import AsyncClient, Response
+
+from app.auth.refresh import REFRESH_COOKIE_NAME
+from app.main import app
+from benchmarks.common import BENCH_EMAIL, BENCH_PASSWORD, Timer, bench_client
+
+SEED_NOTES = 200
+WARMUP_REQUESTS = 10
+LIST_LIMIT = 50
+# Login hashes a password on every request; run it this many times fewer.
+LOGIN_DIVISOR = 10
+
+SCENARIOS = (
+    "notes.list",
+    "notes.get",
+    "notes.create",
+    "notes.update",
+    "notes.delete",
+    "auth.me",
+    "auth.refresh",
+    "auth.login",
+)
+
+Request = Callable[[AsyncClient, int], Awaitable[Response]]
+
+
+@dataclass
+class Result:
+    requests: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+async def login(client: AsyncClient) -> Response:
+    return await client.post(
+        "/auth/jwt/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+
+
+async def run(
+    client: AsyncClient,
+    request: Request,
+    requests: int,
+    concurrency: int,
+    expected_status: int,
+    offset: int = 0,
+) -> Result:
+    """Send *requests* requests from *concurrency* workers, indexed from *offset*."""
+    indexes = iter(range(offset, offset + requests))
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        for i in indexes:
+            start = time.perf_counter()
+            response = await request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != expected_status:
+                raise RuntimeError(
+                    f"{response.request.method} {response.request.url.path}: "
+                    f"{response.status_code} {response.text[:200]}"
+                )
+
+    with Timer() as total:
+        # A TaskGroup cancels the other workers as soon as one fails.
+        async with asyncio.TaskGroup() as group:
+            for _ in range(concurrency):
+                group.create_task(worker())
+    centiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return Result(
+        requests=requests,
+        rps=round(requests / total.seconds, 1),
+        p50_ms=round(centiles[49] * 1000, 3),
+        p95_ms=round(centiles[94] * 1000, 3),
+        p99_ms=round(centiles[98] * 1000, 3),
+    )
+
+
+async def run_suite(
+    requests: int, concurrency: int, database_url: str | None, only: set[str] | None
+) -> dict[str, Result]:
+    # Auth endpoints are rate limited per client address; the suite is one client.
+    app.state.limiter.enabled = False
+    results: dict[str, Result] = {}
+    async with bench_client(database_url, authenticate=False) as client:
+        (await login(client)).raise_for_status()  # access-token cookie for the other scenarios
+        note_ids = []
+        for i in range(SEED_NOTES + WARMUP_REQUESTS + requests):
+            response = await client.post("/notes", json={"title": f"Seed {i}", "body": "x" * 200})
+            note_ids.append(response.json()["id"])
+        seeded, deletable = note_ids[:SEED_NOTES], note_ids[SEED_NOTES:]
+
+        # One refresh token per worker; each refresh takes a token and returns its successor.
+        tokens: asyncio.Queue[str] = asyncio.Queue()
+        for _ in range(concurrency):
+            tokens.put_nowait((await login(client)).cookies[REFRESH_COOKIE_NAME])
+
+        async def refresh(c: AsyncClient, i: int) -> Response:
+            token = await tokens.get()
+            response = await c.post(
+                "/auth/refresh", headers={"Cookie": f"{REFRESH_COOKIE_NAME}={token}"}
+            )
+            tokens.put_nowait(response.cookies.get(REFRESH_COOKIE_NAME, token))
+            return response
+
+        scenarios: dict[str, tuple[Request, int, int]] = {
+            "notes.list": (lambda c, i: c.get("/notes", params={"limit": LIST_LIMIT}), 200, 1),
+            "notes.get": (lambda c, i: c.get(f"/notes/{seeded[i % SEED_NOTES]}"), 200, 1),
+            "notes.create": (lambda c, i: c.post("/notes", json={"title": f"New {i}"}), 201, 1),
+            "notes.update": (
+                lambda c, i: c.patch(f"/notes/{seeded[i % SEED_NOTES]}", json={"body": f"v{i}"}),
+                200,
+                1,
+            ),
+            "notes.delete": (lambda c, i: c.delete(f"/notes/{deletable[i]}"), 204, 1),
+            "auth.me": (lambda c, i: c.get("/auth/me"), 200, 1),
+            "auth.refresh": (refresh, 204, 1),
+            "auth.login": (lambda c, i: login(c), 204, LOGIN_DIVISOR),
+        }
+        for name, (request, expected_status, divisor) in scenarios.items():
+            if only and name not in only:
+                continue
+            count = max(requests // divisor, concurrency, 2)
+            warmup = min(WARMUP_REQUESTS, count)
+            await run(client, request, warmup, concurrency, expected_status)
+            results[name] = await run(
+                client, request, count, concurrency, expected_status, offset=warmup
+            )
+            print_result(name, results[name])
+    return results
+
+
+def print_result(name: str, result: Result) -> None:
+    print(
+        f"{name:<14}{result.requests:>8}{result.rps:>10.1f}"
+        f"{result.p50_ms:>10.2f}{result.p95_ms:>10.2f}{result.p99_ms:>10.2f}"
+    )
+
+
+def compare(results: dict[str, Result], baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of *results* against a saved *baseline*."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result.rps < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result.rps:.1f} req/s vs baseline {base['rps']:.1f}")
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result.p95_ms:.2f}ms vs baseline {base['p95_ms']:.2f}ms"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="run only these (repeatable)"
+    )
+    parser.add_argument("--baseline", type=Path, help="fail on regressions against this file")
+    parser.add_argument("--save-baseline", type=Path, help="write results to this file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed regression (default 0.2 = 20%%)"
+    )
+    args = parser.parse_args()
+
+    print(f"{'scenario':<14}{'requests':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    only = set(args.scenario) if args.scenario else None
+    results = asyncio.run(run_suite(args.requests, args.concurrency, args.database_url, only))
+
+    if args.save_baseline:
+        document = {
+            "meta": {
+                "database": "sqlite"
+                if args.database_url is None
+                else args.database_url.split(":")[0],
+                "concurrency": args.concurrency,
+                "python": platform.python_version(),
+                "machine": platform.node(),
+            },
+            "results": {name: asdict(result) for name, result in results.items()},
+        }
+        args.save_baseline.write_text(json.dumps(document, indent=2) + "\n")
+        print(f"\nbaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print(f"\nregressions beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.auth import current_active_user
+from app.auth.cache import principal_cache
 from app.database import Base, get_async_session
 from app.main import app
 from app.models.user import User
@@ -25,6 +26,7 @@ async def setup_database():
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    principal_cache.clear()
 
 
 async def override_get_async_session() -> AsyncGenerator[AsyncSession, None]:
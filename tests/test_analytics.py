@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Any
+
+from app.analytics import BatchingAnalyticsBackend, NDJSONFileSink
+
+
+class RecordingSink:
+    def __init__(self, fail: bool = False) -> None:
+        self.batches: list[list[dict[str, Any]]] = []
+        self.fail = fail
+
+    async def send(self, events: list[dict[str, Any]]) -> None:
+        if self.fail:
+            raise ConnectionError("sink down")
+        self.batches.append(events)
+
+
+class TestBatchingAnalyticsBackend:
+    async def test_flushes_full_batches_in_background(self):
+        sink = RecordingSink()
+        backend = BatchingAnalyticsBackend(sink, batch_size=3, flush_interval=60)
+        backend.start()
+        try:
+            for i in range(3):
+                backend.track("note.created", properties={"n": i}, user_id="u1")
+            await asyncio.sleep(0.01)
+            assert [len(b) for b in sink.batches] == [3]
+            assert sink.batches[0][0]["event"] == "note.created"
+            assert sink.batches[0][0]["properties"] == {"n": 0}
+        finally:
+            await backend.stop()
+
+    async def test_flushes_partial_batch_on_interval(self):
+        sink = RecordingSink()
+        backend = BatchingAnalyticsBackend(sink, batch_size=100, flush_interval=0.01)
+        backend.start()
+        try:
+            backend.identify("u1", traits={"plan": "pro"})
+            await asyncio.sleep(0.05)
+            [[event]] = sink.batches
+            assert event["type"] == "identify"
+            assert event["traits"] == {"plan": "pro"}
+        finally:
+            await backend.stop()
+
+    async def test_stop_flushes_remaining_events(self):
+        sink = RecordingSink()
+        backend = BatchingAnalyticsBackend(sink, batch_size=2, flush_interval=60)
+        for i in range(5):
+            backend.track(f"event.{i}")
+        await backend.stop()
+        assert [len(b) for b in sink.batches] == [2, 2, 1]
+        assert backend.stats() == {"buffered": 0, "sent": 5, "dropped": 0, "failed": 0}
+
+    async def test_drops_when_buffer_full(self):
+        backend = BatchingAnalyticsBackend(RecordingSink(), max_buffer=2)
+        for i in range(5):
+            backend.track(f"event.{i}")
+        assert backend.stats()["buffered"] == 2
+        assert backend.dropped == 3
+
+    async def test_sink_failures_counted(self):
+        backend = BatchingAnalyticsBackend(RecordingSink(fail=True), batch_size=2)
+        for i in range(3):
+            backend.track(f"event.{i}")
+        await backend.flush()
+        assert backend.stats() == {"buffered": 0, "sent": 0, "dropped": 0, "failed": 3}
+
+
+class TestNDJSONFileSink:
+    async def test_appends_one_line_per_event(self, tmp_path):
+        path = tmp_path / "events.ndjson"
+        backend = BatchingAnalyticsBackend(NDJSONFileSink(path), batch_size=2)
+        backend.track("a", user_id="u1")
+        backend.track("b")
+        backend.identify("u1")
+        await backend.stop()
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["type"] for line in lines] == ["track", "track", "identify"]
+        assert lines[0]["event"] == "a"
+        assert "timestamp" in lines[0]
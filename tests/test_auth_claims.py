@@ -0,0 +1,105 @@
+from collections.abc import AsyncGenerator
+from uuid import uuid4
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import current_principal
+from app.auth.backend import ACCESS_TOKEN_LIFETIME, ClaimsJWTStrategy, get_jwt_strategy
+from app.auth.principal import principal_from_claims
+from app.config import Settings, settings
+from app.main import app, create_app
+from app.models.user import User
+
+strategy = ClaimsJWTStrategy(secret=settings.secret_key, lifetime_seconds=ACCESS_TOKEN_LIFETIME)
+
+
+def make_user(role: str = "user", is_active: bool = True) -> User:
+    return User(
+        id=uuid4(),
+        email="claims@example.com",
+        hashed_password="fake",
+        is_active=is_active,
+        is_superuser=False,
+        role=role,
+    )
+
+
+@pytest.fixture
+async def claims_client(client: AsyncClient) -> AsyncGenerator[AsyncClient, None]:
+    """Client whose requests are authorized from access-token claims only."""
+    app.dependency_overrides[current_principal] = principal_from_claims
+    try:
+        yield client
+    finally:
+        app.dependency_overrides.pop(current_principal, None)
+
+
+class TestClaimsStrategy:
+    async def test_round_trip(self):
+        user = make_user(role="admin")
+        claims = strategy.read_claims(await strategy.write_token(user))
+        assert claims["sub"] == str(user.id)
+        assert claims["role"] == "admin"
+        assert claims["is_active"] is True
+        assert claims["is_superuser"] is False
+
+    async def test_rejects_tampered_token(self):
+        token = await strategy.write_token(make_user())
+        assert strategy.read_claims(token[:-2] + "xx") is None
+
+    async def test_rejects_token_without_claims(self):
+        other = ClaimsJWTStrategy(secret=settings.secret_key, lifetime_seconds=60)
+        token = await super(ClaimsJWTStrategy, other).write_token(make_user())
+        assert strategy.read_claims(token) is None
+
+
+class TestClaimsPrincipal:
+    async def test_notes_without_user_row(self, claims_client: AsyncClient):
+        """The user row does not exist, so any auth lookup would fail."""
+        token = await strategy.write_token(make_user())
+        response = await claims_client.get("/notes", headers={"Cookie": f"app_access={token}"})
+        assert response.status_code == 200
+
+    async def test_missing_cookie(self, claims_client: AsyncClient):
+        response = await claims_client.get("/notes")
+        assert response.status_code == 401
+
+    async def test_inactive_user(self, claims_client: AsyncClient):
+        token = await strategy.write_token(make_user(is_active=False))
+        response = await claims_client.get("/notes", headers={"Cookie": f"app_access={token}"})
+        assert response.status_code == 401
+
+    async def test_role_from_claims(self, claims_client: AsyncClient):
+        token = await strategy.write_token(make_user(role="user"))
+        response = await claims_client.patch(
+            f"/admin/users/{uuid4()}/role",
+            json={"role": "admin"},
+            headers={"Cookie": f"app_access={token}"},
+        )
+        assert response.status_code == 403
+
+    async def test_admin_from_claims(self, claims_client: AsyncClient):
+        token = await strategy.write_token(make_user(role="admin"))
+        response = await claims_client.patch(
+            f"/admin/users/{uuid4()}/role",
+            json={"role": "admin"},
+            headers={"Cookie": f"app_access={token}"},
+        )
+        assert response.status_code == 404
+
+
+class TestClaimsSetting:
+    async def test_app_built_with_claims_skips_user_lookup(self):
+        claims_app = create_app(Settings(access_token_claims=True))
+        assert isinstance(get_jwt_strategy(claims_app.state.settings), ClaimsJWTStrategy)
+        token = await strategy.write_token(make_user())
+        transport = ASGITransport(app=claims_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/flags", headers={"Cookie": f"app_access={token}"})
+        assert response.status_code == 200
+
+    def test_app_built_without_claims_loads_user(self):
+        user_app = create_app(Settings(access_token_claims=False))
+        assert current_principal not in user_app.dependency_overrides
+        assert not isinstance(get_jwt_strategy(user_app.state.settings), ClaimsJWTStrategy)
@@ -0,0 +1,190 @@
+import asyncio
+from contextlib import suppress
+from datetime import UTC, datetime, timedelta
+from functools import partial
+
+from fastapi_users.password import PasswordHelper
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app import database, tasks
+from app.auth.refresh import (
+    REFRESH_COOKIE_NAME,
+    REFRESH_REUSE_GRACE,
+    cleanup_expired_tokens,
+    create_refresh_token,
+)
+from app.auth.token_partitions import partition_name, partition_start, partition_starts
+from app.database import advisory_lock
+from app.main import app
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from tests.conftest import async_session_maker, engine
+
+
+async def refresh(client: AsyncClient, token: str):
+    return await client.post("/auth/refresh", headers={"Cookie": f"{REFRESH_COOKIE_NAME}={token}"})
+
+
+async def family_tokens(session, user: User) -> list[RefreshToken]:
+    result = await session.scalars(
+        select(RefreshToken)
+        .where(RefreshToken.user_id == user.id)
+        .execution_options(populate_existing=True)
+    )
+    return list(result)
+
+
+class TestRefreshRotation:
+    async def test_rotates_token(self, client: AsyncClient, test_user: User, session):
+        session.add(test_user)
+        await session.commit()
+        token = await create_refresh_token(str(test_user.id), session)
+
+        response = await refresh(client, token)
+        assert response.status_code == 204
+        assert response.cookies["app_access"]
+        assert response.cookies[REFRESH_COOKIE_NAME] != token
+
+        tokens = await family_tokens(session, test_user)
+        assert len(tokens) == 2
+        assert sorted(t.is_revoked for t in tokens) == [False, True]
+        assert len({t.token_family for t in tokens}) == 1
+
+    async def test_reuse_revokes_family(self, client: AsyncClient, test_user: User, session):
+        session.add(test_user)
+        await session.commit()
+        token = await create_refresh_token(str(test_user.id), session)
+
+        rotated = (await refresh(client, token)).cookies[REFRESH_COOKIE_NAME]
+        await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.replaced_at.is_not(None))
+            .values(replaced_at=datetime.now(UTC) - REFRESH_REUSE_GRACE)
+        )
+        await session.commit()
+        assert (await refresh(client, token)).status_code == 401
+        assert (await refresh(client, rotated)).status_code == 401
+        assert all(t.is_revoked for t in await family_tokens(session, test_user))
+
+    async def test_expired_token_rejected(self, client: AsyncClient, test_user: User, session):
+        session.add(test_user)
+        await session.commit()
+        token = await create_refresh_token(str(test_user.id), session)
+        await session.execute(
+            update(RefreshToken).values(expires_at=datetime.now(UTC) - timedelta(seconds=1))
+        )
+        await session.commit()
+
+        assert (await refresh(client, token)).status_code == 401
+        tokens = await family_tokens(session, test_user)
+        assert [t.is_revoked for t in tokens] == [False]
+
+    async def test_concurrent_refreshes_rotate_once(
+        self, client: AsyncClient, test_user: User, session
+    ):
+        session.add(test_user)
+        await session.commit()
+        token = await create_refresh_token(str(test_user.id), session)
+
+        responses = await asyncio.gather(*(refresh(client, token) for _ in range(8)))
+        assert sorted(r.status_code for r in responses) == [204] + [401] * 7
+
+        # The losers are not mistaken for reuse, so the winner's token still rotates
+        winner = next(r for r in responses if r.status_code == 204)
+        assert (await refresh(client, winner.cookies[REFRESH_COOKIE_NAME])).status_code == 204
+
+
+class TestLoginRefreshToken:
+    async def test_login_issues_refresh_token(self, client: AsyncClient, session):
+        user = User(
+            email="login@example.com",
+            hashed_password=PasswordHelper().hash("correct-horse"),
+            is_active=True,
+        )
+        session.add(user)
+        await session.commit()
+
+        app.state.limiter.reset()
+        try:
+            response = await client.post(
+                "/auth/jwt/login",
+                data={"username": "login@example.com", "password": "correct-horse"},
+            )
+        finally:
+            app.state.limiter.reset()
+        assert response.status_code == 204
+        assert response.cookies[REFRESH_COOKIE_NAME]
+        assert len(await family_tokens(session, user)) == 1
+
+
+async def seed_tokens(session, user: User) -> RefreshToken:
+    """Add 3 expired and 2 revoked tokens for *user*; return a live one."""
+    now = datetime.now(UTC)
+    session.add(user)
+    for i in range(5):
+        session.add(
+            RefreshToken(
+                user_id=user.id,
+                token_family="stale",
+                is_revoked=i >= 3,
+                expires_at=now - timedelta(days=1) if i < 3 else now + timedelta(days=1),
+            )
+        )
+    live = RefreshToken(user_id=user.id, token_family="live", expires_at=now + timedelta(days=1))
+    session.add(live)
+    await session.commit()
+    return live
+
+
+class TestRefreshTokenPurge:
+    async def test_deletes_in_batches(self, test_user: User, session):
+        live = await seed_tokens(session, test_user)
+
+        assert await cleanup_expired_tokens(session, batch_size=2) == 5
+        assert [t.id for t in await family_tokens(session, test_user)] == [live.id]
+        assert await cleanup_expired_tokens(session, batch_size=2) == 0
+
+    async def test_purge_task(self, test_user: User, session, monkeypatch):
+        await seed_tokens(session, test_user)
+        monkeypatch.setattr(database, "async_session_maker", async_session_maker)
+        monkeypatch.setattr(tasks, "advisory_lock", partial(advisory_lock, bind=engine))
+
+        assert await tasks.purge_refresh_tokens() == 5
+
+    async def test_run_periodically_survives_failures(self):
+        calls = []
+
+        async def job():
+            calls.append(None)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+
+        task = asyncio.create_task(tasks.run_periodically(0, job))
+        while len(calls) < 3:
+            await asyncio.sleep(0)
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        assert len(calls) >= 3
+
+
+class TestTokenPartitions:
+    def test_partition_start_is_monday_utc(self):
+        start = partition_start(datetime(2026, 10, 17, 23, 30, tzinfo=UTC))
+        assert start == datetime(2026, 10, 12, tzinfo=UTC)
+        assert partition_name(start) == "refresh_tokens_p20261012"
+
+    def test_partitions_cover_token_lifetime(self):
+        now = datetime(2026, 10, 17, 12, tzinfo=UTC)
+        starts = partition_starts(now)
+        assert starts[0] == datetime(2026, 10, 12, tzinfo=UTC)
+        assert all(b - a == timedelta(weeks=1) for a, b in zip(starts, starts[1:], strict=False))
+        assert starts[-1] > now + timedelta(days=7)
+
+    def test_postgres_table_is_partitioned(self):
+        ddl = str(CreateTable(RefreshToken.__table__).compile(dialect=postgresql.dialect()))
+        assert "PARTITION BY RANGE (expires_at)" in ddl
+        assert "PRIMARY KEY (id, expires_at)" in ddl
@@ -0,0 +1,70 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import InstrumentedQueuePool, engine_options, pool_stats
+
+
+class TestEngineOptions:
+    def test_sqlite_keeps_default_pool(self):
+        assert engine_options("sqlite+aiosqlite:///:memory:") == {}
+
+    def test_postgres_pool_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "db_pool_size", 20)
+        monkeypatch.setattr(settings, "db_pool_pre_ping", True)
+        options = engine_options("postgresql+asyncpg://u:p@db/app")
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert options["pool_size"] == 20
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"]["statement_cache_size"] == 100
+        assert "prepared_statement_name_func" not in options["connect_args"]
+
+    def test_pgbouncer_disables_statement_cache(self, monkeypatch):
+        monkeypatch.setattr(settings, "db_statement_cache_size", 0)
+        connect_args = engine_options("postgresql+asyncpg://u:p@db/app")["connect_args"]
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_cache_size"] == 0
+        name = connect_args["prepared_statement_name_func"]
+        assert name() != name()
+
+
+class TestPoolStats:
+    async def test_records_waits_and_timeouts(self, tmp_path):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        waits: list[float] = []
+        engine.pool.on_wait = waits.append
+        try:
+            async with engine.connect():
+                stats = pool_stats(engine)
+                assert stats["checked_out"] == 1
+                assert stats["waits"] == 0
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+            stats = pool_stats(engine)
+            assert stats["checked_out"] == 0
+            assert stats["waits"] == 1
+            assert stats["timeouts"] == 1
+            assert stats["wait_seconds_max"] >= 0.05
+            assert len(waits) == 1
+            assert waits[0] >= 0.05
+            assert engine.pool.recreate().on_wait == waits.append
+        finally:
+            await engine.dispose()
+
+    async def test_admin_endpoint(self, admin_client: AsyncClient):
+        response = await admin_client.get("/admin/pool")
+        assert response.status_code == 200
+        assert "pid" in response.json()
+
+    async def test_admin_endpoint_forbidden_for_users(self, auth_client: AsyncClient):
+        response = await auth_client.get("/admin/pool")
+        assert response.status_code == 403
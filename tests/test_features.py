@@ -0,0 +1,112 @@
+import json
+import os
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.features import FeatureFlags, FlagRule, compile_flags, get_feature_flags
+from app.main import app
+from app.models.user import User
+
+
+def write_flags(path, rules: dict) -> None:
+    path.write_text(json.dumps(rules))
+    # Make the change visible even within the filesystem's mtime resolution.
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestFlagRules:
+    def test_plain_booleans(self):
+        flags = compile_flags({"on": True, "off": False}).flags
+        assert flags["on"].evaluate(None, None) is True
+        assert flags["off"].evaluate("u1", "admin") is False
+
+    def test_role_and_allowlist_targeting(self):
+        flag = compile_flags({"beta": FlagRule(roles=["admin"], users=["u1"])}).flags["beta"]
+        assert flag.evaluate("u1", "user") is True
+        assert flag.evaluate("u2", "admin") is True
+        assert flag.evaluate("u2", "user") is False
+        assert flag.evaluate(None, None) is False
+
+    def test_disabled_rule_overrides_targeting(self):
+        flag = compile_flags({"beta": FlagRule(enabled=False, users=["u1"])}).flags["beta"]
+        assert flag.evaluate("u1", "admin") is False
+
+    def test_rollout_is_stable_and_proportional(self):
+        flag = compile_flags({"beta": FlagRule(rollout=25)}).flags["beta"]
+        users = [str(uuid4()) for _ in range(4000)]
+        enabled = [flag.evaluate(u, None) for u in users]
+        assert enabled == [flag.evaluate(u, None) for u in users]
+        assert 0.2 < sum(enabled) / len(users) < 0.3
+
+    def test_version_tracks_rules(self):
+        assert compile_flags({"a": True}).version == compile_flags({"a": True}).version
+        assert compile_flags({"a": True}).version != compile_flags({"a": False}).version
+
+
+class TestFeatureFlags:
+    def test_env_flags(self, monkeypatch):
+        monkeypatch.setenv("FEATURE_NEW_DASHBOARD", "true")
+        flags = FeatureFlags()
+        assert flags.is_enabled("new_dashboard") is True
+        assert flags.is_enabled("missing") is False
+
+    def test_file_overrides_env_and_uses_context(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("FEATURE_BETA", "false")
+        path = tmp_path / "flags.json"
+        write_flags(path, {"beta": {"roles": ["admin"]}})
+        flags = FeatureFlags(path)
+        assert flags.is_enabled("beta", context={"user_id": uuid4(), "role": "admin"}) is True
+        assert flags.is_enabled("beta") is False
+
+    def test_reload_on_change(self, tmp_path):
+        path = tmp_path / "flags.json"
+        write_flags(path, {"beta": False})
+        flags = FeatureFlags(path)
+        assert flags.reload() is False
+
+        write_flags(path, {"beta": True})
+        assert flags.reload() is True
+        assert flags.is_enabled("beta") is True
+
+    def test_invalid_file_keeps_snapshot(self, tmp_path):
+        path = tmp_path / "flags.json"
+        write_flags(path, {"beta": True})
+        flags = FeatureFlags(path)
+        write_flags(path, {"beta": {"rollout": 150}})
+        assert flags.reload() is False
+        assert flags.is_enabled("beta") is True
+
+
+class TestFlagsEndpoint:
+    @pytest.fixture
+    def flags(self, tmp_path, test_user: User):
+        path = tmp_path / "flags.json"
+        write_flags(path, {"everyone": True, "beta": {"users": [str(test_user.id)]}})
+        flags = FeatureFlags(path)
+        app.dependency_overrides[get_feature_flags] = lambda: flags
+        yield flags
+        app.dependency_overrides.pop(get_feature_flags, None)
+
+    async def test_evaluated_for_user_with_etag(self, auth_client: AsyncClient, flags):
+        response = await auth_client.get("/flags")
+        assert response.status_code == 200
+        assert response.json() == {"everyone": True, "beta": True}
+        etag = response.headers["etag"]
+
+        response = await auth_client.get("/flags", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    async def test_etag_changes_with_rules(self, auth_client: AsyncClient, flags):
+        etag = (await auth_client.get("/flags")).headers["etag"]
+        write_flags(flags.path, {"everyone": True, "beta": False})
+        flags.reload()
+        response = await auth_client.get("/flags", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json() == {"everyone": True, "beta": False}
+
+    async def test_requires_auth(self, client: AsyncClient):
+        response = await client.get("/flags")
+        assert response.status_code == 401
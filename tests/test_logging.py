@@ -0,0 +1,69 @@
+import logging
+import queue
+
+import pytest
+
+from app import logging as app_logging
+from app.config import settings
+from app.logging import BoundedQueueHandler
+
+
+def _record(msg: object, *args: object) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+
+class TestBoundedQueueHandler:
+    def test_drops_and_counts_when_full(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+        for i in range(5):
+            handler.handle(_record("event %d", i))
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
+
+    def test_block_policy_waits_for_room(self):
+        log_queue: queue.Queue = queue.Queue(maxsize=1)
+        handler = BoundedQueueHandler(log_queue, block=True)
+        handler.handle(_record("first"))
+        log_queue.get_nowait()
+        handler.handle(_record("second"))
+        assert handler.dropped == 0
+        assert log_queue.get_nowait().msg == "second"
+
+    def test_structlog_event_dict_left_for_listener(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        event = {"event": "note.created"}
+        handler.handle(_record(event))
+        assert handler.queue.get_nowait().msg is event
+
+    def test_foreign_args_merged_on_enqueue(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        items = ["a"]
+        handler.handle(_record("items=%s", items))
+        items.append("b")
+        record = handler.queue.get_nowait()
+        assert record.getMessage() == "items=['a']"
+
+
+class TestQueuedLogging:
+    @pytest.fixture
+    def restore_logging(self, monkeypatch):
+        yield
+        monkeypatch.undo()
+        app_logging.setup_logging()
+
+    def test_shutdown_writes_queued_records(self, monkeypatch, capsys, restore_logging):
+        monkeypatch.setattr(settings, "log_queue_size", 100)
+        app_logging.setup_logging()
+        app_logging.get_logger("test").warning("queued.event", n=1)
+        assert app_logging.log_queue_stats()["dropped"] == 0
+
+        app_logging.shutdown_logging()
+        assert "queued.event" in capsys.readouterr().out
+        assert app_logging.log_queue_stats() is None
+
+    def test_synchronous_when_queue_disabled(self, monkeypatch, capsys, restore_logging):
+        monkeypatch.setattr(settings, "log_queue_size", 0)
+        app_logging.setup_logging()
+        assert app_logging.log_queue_stats() is None
+        app_logging.get_logger("test").warning("direct.event")
+        assert "direct.event" in capsys.readouterr().out
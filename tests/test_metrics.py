@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app import metrics
+from app.auth.cache import principal_cache
+from app.auth.security_logging import SecurityEvent, log_security_event
+from app.config import settings
+from app.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def sample(text: str, line_start: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class TestRegistry:
+    def test_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("jobs_total", "Jobs run.", ("kind",)))
+        histogram = registry.register(
+            Histogram("job_seconds", "Job time.", ("kind",), buckets=(0.1, 1.0))
+        )
+        counter.inc('say "hi"')
+        histogram.observe(0.05, "a")
+        histogram.observe(0.5, "a")
+        histogram.observe(5, "a")
+
+        text = registry.render(registry.merge([(registry.collect(), True)]))
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{kind="say \\"hi\\""} 1' in text
+        assert 'job_seconds_bucket{kind="a",le="0.1"} 1' in text
+        assert 'job_seconds_bucket{kind="a",le="1.0"} 2' in text
+        assert 'job_seconds_bucket{kind="a",le="+Inf"} 3' in text
+        assert 'job_seconds_sum{kind="a"} 5.55' in text
+        assert 'job_seconds_count{kind="a"} 3' in text
+
+    def test_merge_sums_workers_and_skips_stale_gauges(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("requests_total", "Requests."))
+        gauge = registry.register(Gauge("in_flight", "In flight."))
+        counter.inc(amount=2)
+        gauge.set(3)
+        own = registry.collect()
+        other = {"requests_total": [[[], 5]], "in_flight": [[[], 4]]}
+
+        merged = registry.merge([(own, True), (other, True)])
+        assert merged == {"requests_total": {(): 7}, "in_flight": {(): 7}}
+        merged = registry.merge([(own, True), (other, False)])
+        assert merged == {"requests_total": {(): 7}, "in_flight": {(): 3}}
+
+
+async def scrape(client: AsyncClient):
+    return await client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+
+
+class TestMetricsEndpoint:
+    @pytest.fixture(autouse=True)
+    def metrics_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_token", "scrape-token")
+
+    async def test_requires_token(self, client: AsyncClient, monkeypatch):
+        assert (await client.get("/metrics")).status_code == 401
+        wrong = await client.get("/metrics", headers={"Authorization": "Bearer nope"})
+        assert wrong.status_code == 401
+        assert (await scrape(client)).status_code == 200
+
+        monkeypatch.setattr(settings, "metrics_token", "")
+        assert (await scrape(client)).status_code == 404
+
+    async def test_requests_labelled_by_route_template(self, auth_client: AsyncClient):
+        before = await scrape(auth_client)
+        key = 'http_requests_total{method="GET",route="/notes/{note_id}",status="404"}'
+        count = sample(before.text, key)
+
+        await auth_client.get(f"/notes/{uuid4()}")
+        await auth_client.get(f"/notes/{uuid4()}")
+
+        response = await scrape(auth_client)
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert sample(response.text, key) == count + 2
+        assert 'route="/notes/{note_id}"' in response.text
+        assert "http_requests_in_progress 1" in response.text
+
+    async def test_unmatched_paths_share_a_label(self, client: AsyncClient):
+        await client.get(f"/no-such-page/{uuid4()}")
+        response = await scrape(client)
+        assert 'route="<unmatched>",status="404"' in response.text
+
+    async def test_security_events_counted(self, client: AsyncClient):
+        key = 'security_events_total{event="LOGOUT"}'
+        count = sample((await scrape(client)).text, key)
+        log_security_event(SecurityEvent.LOGOUT, user_id="u1")
+        assert sample((await scrape(client)).text, key) == count + 1
+
+    async def test_principal_cache_exported(self, client: AsyncClient, monkeypatch):
+        monkeypatch.setattr(principal_cache, "hits", 7)
+        monkeypatch.setattr(principal_cache, "evictions", 2)
+        text = (await scrape(client)).text
+        assert "# TYPE principal_cache_hits_total counter" in text
+        assert sample(text, "principal_cache_hits_total") == 7
+        assert sample(text, "principal_cache_evictions_total") == 2
+        assert "principal_cache_entries " in text
+
+    async def test_merges_other_workers(self, client: AsyncClient, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "metrics_multiproc_dir", str(tmp_path))
+        key = 'rate_limit_rejections_total{path="/auth/jwt/login"}'
+        count = sample((await scrape(client)).text, key)
+
+        metrics.write_state(tmp_path, metrics.registry.collect())  # this worker: ignored
+        other = tmp_path / f"{os.getpid() + 1}.json"
+        other.write_text(json.dumps({"rate_limit_rejections_total": [[["/auth/jwt/login"], 3]]}))
+        stale = tmp_path / f"{os.getpid() + 2}.json"
+        stale.write_text(json.dumps({"http_requests_in_progress": [[[], 50]]}))
+        old = time.time() - 3600
+        os.utime(stale, (old, old))
+
+        text = (await scrape(client)).text
+        assert sample(text, key) == count + 3
+        assert sample(text, "http_requests_in_progress") == 1
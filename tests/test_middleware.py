@@ -0,0 +1,85 @@
+import pytest
+from httpx import AsyncClient
+
+from app import middleware
+from app.main import app
+from app.middleware import RequestContextMiddleware
+
+
+class TestRequestContext:
+    async def test_security_headers(self, client: AsyncClient):
+        response = await client.get("/health")
+        assert response.status_code == 200
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert response.headers["x-frame-options"] == "DENY"
+        assert "max-age=63072000" in response.headers["strict-transport-security"]
+
+    async def test_generates_request_id(self, client: AsyncClient):
+        response = await client.get("/health")
+        assert len(response.headers["x-request-id"]) == 36
+
+    async def test_echoes_request_id(self, client: AsyncClient):
+        response = await client.get("/health", headers={"X-Request-ID": "abc-123"})
+        assert response.headers["x-request-id"] == "abc-123"
+
+
+class TestAuthRateLimit:
+    async def test_login_rate_limited(self, client: AsyncClient):
+        app.state.limiter.reset()
+        try:
+            for _ in range(5):
+                response = await client.post(
+                    "/auth/jwt/login", data={"username": "x@example.com", "password": "x"}
+                )
+                assert response.status_code != 429
+
+            response = await client.post(
+                "/auth/jwt/login", data={"username": "x@example.com", "password": "x"}
+            )
+            assert response.status_code == 429
+            assert response.json() == {"detail": "Rate limit exceeded"}
+            assert response.headers["x-frame-options"] == "DENY"
+            assert "x-request-id" in response.headers
+        finally:
+            app.state.limiter.reset()
+
+    async def test_get_not_rate_limited(self, client: AsyncClient):
+        app.state.limiter.reset()
+        for _ in range(10):
+            response = await client.get("/auth/refresh")
+            assert response.status_code == 405
+
+
+class TestAccessLogSampling:
+    @pytest.fixture
+    def sampled(self) -> RequestContextMiddleware:
+        return RequestContextMiddleware(
+            app,
+            limiter=app.state.limiter,
+            rate_limits={},
+            sample_rate=0.1,
+            slow_ms=500,
+            exclude_paths=frozenset({"/health"}),
+        )
+
+    def test_defaults_log_everything(self):
+        mw = RequestContextMiddleware(app, limiter=app.state.limiter, rate_limits={})
+        assert mw._sample_rate("/health", 200, 5000) == 1.0
+        assert mw._sample_rate("/notes", 200, 1) == 1.0
+
+    def test_successes_sampled_at_rate(self, sampled, monkeypatch):
+        monkeypatch.setattr(middleware.random, "random", lambda: 0.05)
+        assert sampled._sample_rate("/notes", 200, 10) == 0.1
+        monkeypatch.setattr(middleware.random, "random", lambda: 0.5)
+        assert sampled._sample_rate("/notes", 200, 10) is None
+
+    def test_errors_and_slow_requests_always_kept(self, sampled, monkeypatch):
+        monkeypatch.setattr(middleware.random, "random", lambda: 0.99)
+        assert sampled._sample_rate("/notes", 404, 10) == 1.0
+        assert sampled._sample_rate("/notes", 500, 10) == 1.0
+        assert sampled._sample_rate("/notes", 200, 750) == 1.0
+        assert sampled._sample_rate("/health", 503, 10) == 1.0
+
+    def test_excluded_paths_skipped(self, sampled, monkeypatch):
+        monkeypatch.setattr(middleware.random, "random", lambda: 0.0)
+        assert sampled._sample_rate("/health", 200, 10) is None
@@ -1,11 +1,22 @@
+import json
+from datetime import UTC, datetime, timedelta
+from unittest.mock import ANY
 from uuid import uuid4
 
+import pytest
 from httpx import AsyncClient
+from pydantic import ValidationError
+from sqlalchemy import event
 
+from app import notes_import, serialization
 from app.auth import current_active_user
+from app.config import settings
 from app.main import app
 from app.models.note import Note
 from app.models.user import User
+from app.routers import notes as notes_module
+from app.schemas.note import MAX_BATCH_OPERATIONS, NoteRead
+from tests.conftest import engine
 
 
 class TestListNotes:
@@ -13,7 +24,7 @@ class TestListNotes:
         app.dependency_overrides[current_active_user] = lambda: test_user
         response = await client.get("/notes")
         assert response.status_code == 200
-        assert response.json() == []
+        assert response.json() == {"items": [], "next_cursor": None}
 
     async def test_list_with_data(self, client: AsyncClient, test_user: User, session):
         app.dependency_overrides[current_active_user] = lambda: test_user
@@ -23,7 +34,7 @@ class TestListNotes:
 
         response = await client.get("/notes")
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) == 1
         assert data[0]["title"] == "Test note"
 
@@ -38,7 +49,49 @@ class TestListNotes:
 
         response = await client.get("/notes")
         assert response.status_code == 200
-        assert response.json() == []
+        assert response.json()["items"] == []
+
+    async def test_cursor_pagination(self, client: AsyncClient, test_user: User, session):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        base = datetime(2026, 1, 1, tzinfo=UTC)
+        # Two notes share a timestamp to exercise the id tiebreak.
+        for i, offset in enumerate([0, 1, 1, 2, 3]):
+            session.add(
+                Note(
+                    title=f"n{i}", user_id=test_user.id, created_at=base + timedelta(seconds=offset)
+                )
+            )
+        await session.commit()
+
+        titles, cursor = [], None
+        while True:
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            response = await client.get("/notes", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["items"]) <= 2
+            titles += [note["title"] for note in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(titles) == 5
+        assert set(titles) == {"n0", "n1", "n2", "n3", "n4"}
+        assert titles[0] == "n4"
+        assert titles[-1] == "n0"
+
+    async def test_last_page_has_no_cursor(self, client: AsyncClient, test_user: User, session):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        session.add(Note(title="only", user_id=test_user.id))
+        await session.commit()
+
+        response = await client.get("/notes", params={"limit": 1})
+        assert response.json()["next_cursor"] is None
+
+    async def test_invalid_cursor(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        response = await client.get("/notes", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
 
 
 class TestCreateNote:
@@ -137,3 +190,347 @@ class TestDeleteNote:
         app.dependency_overrides[current_active_user] = lambda: test_user
         response = await client.delete(f"/notes/{uuid4()}")
         assert response.status_code == 404
+
+
+@pytest.fixture
+def statements():
+    """SQL statements executed against the test engine while the test runs."""
+    executed: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield executed
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+class TestWriteRoundTrips:
+    """Each single-note write is one statement, with no lookup before it."""
+
+    def writes(self, statements: list[str]) -> list[str]:
+        return [s for s in statements if s.split()[0] in {"SELECT", "INSERT", "UPDATE", "DELETE"}]
+
+    async def test_create(self, client: AsyncClient, test_user: User, statements):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        response = await client.post("/notes", json={"title": "One trip"})
+        assert response.status_code == 201
+        assert [s.split()[0] for s in self.writes(statements)] == ["INSERT"]
+
+    async def test_update(self, client: AsyncClient, test_user: User, session, statements):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        note = Note(title="Original", user_id=test_user.id)
+        session.add(note)
+        await session.commit()
+        statements.clear()
+
+        response = await client.patch(f"/notes/{note.id}", json={"title": "Updated"})
+        assert response.status_code == 200
+        assert response.json()["title"] == "Updated"
+        assert [s.split()[0] for s in self.writes(statements)] == ["UPDATE"]
+
+    async def test_delete(self, client: AsyncClient, test_user: User, session, statements):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        note = Note(title="Delete me", user_id=test_user.id)
+        session.add(note)
+        await session.commit()
+        statements.clear()
+
+        response = await client.delete(f"/notes/{note.id}")
+        assert response.status_code == 204
+        assert [s.split()[0] for s in self.writes(statements)] == ["DELETE"]
+
+
+class TestConditionalGet:
+    async def test_note_etag(self, client: AsyncClient, test_user: User, session, statements):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        note = Note(title="Cached", body="Long body", user_id=test_user.id)
+        session.add(note)
+        await session.commit()
+
+        response = await client.get(f"/notes/{note.id}")
+        etag = response.headers["etag"]
+        assert response.headers["last-modified"].endswith("GMT")
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        statements.clear()
+        response = await client.get(f"/notes/{note.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert not any("notes.body" in s for s in statements)
+
+        await client.patch(f"/notes/{note.id}", json={"title": "Changed"})
+        response = await client.get(f"/notes/{note.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    async def test_note_etag_not_found(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        response = await client.get(f"/notes/{uuid4()}", headers={"If-None-Match": '"x"'})
+        assert response.status_code == 404
+
+    async def test_list_etag(self, client: AsyncClient, test_user: User, session, statements):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        notes = [Note(title=f"Note {i}", user_id=test_user.id) for i in range(3)]
+        session.add_all(notes)
+        await session.commit()
+
+        etag = (await client.get("/notes")).headers["etag"]
+        statements.clear()
+        response = await client.get("/notes", headers={"If-None-Match": f'W/{etag}, "other"'})
+        assert response.status_code == 304
+        assert not any("notes.body" in s for s in statements)
+
+        # Deleting a note doesn't raise the newest updated_at, but still changes the tag
+        await client.delete(f"/notes/{notes[0].id}")
+        response = await client.get("/notes", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 2
+
+    async def test_list_etag_depends_on_page(self, client: AsyncClient, test_user: User, session):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        session.add_all([Note(title=f"Note {i}", user_id=test_user.id) for i in range(3)])
+        await session.commit()
+
+        full = (await client.get("/notes")).headers["etag"]
+        response = await client.get("/notes?limit=2", headers={"If-None-Match": full})
+        assert response.status_code == 200
+
+
+class TestFastJSON:
+    async def test_same_json_as_response_model(
+        self, client: AsyncClient, test_user: User, session, monkeypatch
+    ):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        note = Note(title="Fast", body="Body", user_id=test_user.id)
+        session.add_all([note, Note(title="Other", user_id=test_user.id)])
+        await session.commit()
+
+        default = [await client.get("/notes"), await client.get(f"/notes/{note.id}")]
+        monkeypatch.setattr(settings, "fast_json", True)
+        fast = [await client.get("/notes"), await client.get(f"/notes/{note.id}")]
+        for expected, response in zip(default, fast, strict=True):
+            assert response.status_code == 200
+            assert response.content == expected.content
+            assert response.headers["etag"] == expected.headers["etag"]
+
+    async def test_writes(self, client: AsyncClient, test_user: User, monkeypatch):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        monkeypatch.setattr(settings, "fast_json", True)
+        monkeypatch.setattr(serialization, "orjson", None)
+
+        response = await client.post("/notes", json={"title": "Fast", "body": "Body"})
+        assert response.status_code == 201
+        created = response.json()
+        response = await client.patch(f"/notes/{created['id']}", json={"title": "Faster"})
+        assert response.status_code == 200
+        assert response.json() == {**created, "title": "Faster", "updated_at": ANY}
+
+    async def test_unloaded_fields_are_rejected(self, test_user: User, session):
+        note = Note(title="Fast", user_id=test_user.id)
+        session.add(note)
+        await session.commit()
+        dump = serialization.orm_dump(NoteRead)
+        assert dump([note])[0]["title"] == "Fast"
+
+        session.expire(note, ["updated_at"])
+        with pytest.raises(ValidationError, match="updated_at"):
+            dump([note])
+
+
+class TestBatchNotes:
+    async def test_mixed_operations(self, client: AsyncClient, test_user: User, session):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        keep = Note(title="Keep", body="Old body", user_id=test_user.id)
+        drop = Note(title="Drop", user_id=test_user.id)
+        session.add_all([keep, drop])
+        await session.commit()
+
+        response = await client.post(
+            "/notes/batch",
+            json={
+                "operations": [
+                    {"op": "create", "title": "First"},
+                    {"op": "update", "id": str(keep.id), "title": "Kept"},
+                    {"op": "create", "title": "Second", "body": "b"},
+                    {"op": "delete", "id": str(drop.id)},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == [201, 200, 201, 204]
+        assert [r["index"] for r in results] == [0, 1, 2, 3]
+        assert results[0]["note"]["title"] == "First"
+        assert results[2]["note"]["body"] == "b"
+        assert results[1]["note"]["title"] == "Kept"
+        assert results[1]["note"]["body"] == "Old body"
+
+        listed = (await client.get("/notes")).json()["items"]
+        assert {n["title"] for n in listed} == {"First", "Second", "Kept"}
+
+    async def test_other_users_notes_not_found(
+        self, client: AsyncClient, test_user: User, other_user: User, session
+    ):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        theirs = Note(title="Theirs", user_id=other_user.id)
+        session.add(theirs)
+        await session.commit()
+
+        response = await client.post(
+            "/notes/batch",
+            json={
+                "operations": [
+                    {"op": "update", "id": str(theirs.id), "title": "Mine now"},
+                    {"op": "delete", "id": str(uuid4())},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["results"]] == [404, 404]
+
+        await session.refresh(theirs)
+        assert theirs.title == "Theirs"
+
+    async def test_duplicate_ids_rejected(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        note_id = str(uuid4())
+        response = await client.post(
+            "/notes/batch",
+            json={
+                "operations": [
+                    {"op": "update", "id": note_id, "title": "x"},
+                    {"op": "delete", "id": note_id},
+                ]
+            },
+        )
+        assert response.status_code == 422
+
+    async def test_size_cap(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        operations = [{"op": "create", "title": "n"}] * (MAX_BATCH_OPERATIONS + 1)
+        response = await client.post("/notes/batch", json={"operations": operations})
+        assert response.status_code == 422
+
+
+class TestExportNotes:
+    async def test_export_ndjson(
+        self, client: AsyncClient, test_user: User, other_user: User, session, monkeypatch
+    ):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        monkeypatch.setattr(notes_module, "EXPORT_BATCH_SIZE", 2)
+        session.add_all([Note(title=f"n{i}", user_id=test_user.id) for i in range(5)])
+        session.add(Note(title="theirs", user_id=other_user.id))
+        await session.commit()
+
+        response = await client.get("/notes/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(note["title"] for note in lines) == ["n0", "n1", "n2", "n3", "n4"]
+        assert {"id", "title", "body", "created_at", "updated_at"} <= lines[0].keys()
+
+    async def test_export_empty(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        response = await client.get("/notes/export")
+        assert response.status_code == 200
+        assert response.text == ""
+
+
+class TestImportNotes:
+    async def test_import_ndjson(self, client: AsyncClient, test_user: User, monkeypatch):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        monkeypatch.setattr(notes_import, "IMPORT_BATCH_SIZE", 2)
+        body = "\n".join(
+            [
+                json.dumps({"title": "one", "body": "first"}),
+                json.dumps({"title": "two"}),
+                "",
+                "{not json",
+                json.dumps({"title": ""}),
+                json.dumps({"title": "three"}),
+            ]
+        )
+        response = await client.post(
+            "/notes/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 3
+        assert data["failed"] == 2
+        assert [error["line"] for error in data["errors"]] == [4, 5]
+        assert data["errors"][1]["error"].startswith("title:")
+
+        listed = (await client.get("/notes")).json()["items"]
+        assert {note["title"] for note in listed} == {"one", "two", "three"}
+
+    async def test_rows_get_their_own_timestamps(self, test_user: User, session, monkeypatch):
+        written: list[dict] = []
+
+        async def capture(connection, rows):
+            written.extend(rows)
+
+        async def records():
+            for i in range(50):
+                yield i + 1, {"title": f"note {i}"}, None
+
+        monkeypatch.setattr(notes_import, "_insert_batch", capture)
+        await notes_import.import_notes(session, test_user.id, records())
+        created = [row["created_at"] for row in written]
+        assert created == sorted(created) and len(set(created)) > 1
+        assert all(row["updated_at"] == row["created_at"] for row in written)
+
+    async def test_copy_sends_timestamps(self, test_user: User):
+        copied = {}
+
+        class Driver:
+            async def copy_records_to_table(self, table, *, records, columns):
+                copied.update(table=table, records=records, columns=columns)
+
+        class Connection:
+            async def get_raw_connection(self):
+                return type("Raw", (), {"driver_connection": Driver()})()
+
+        now = datetime.now(UTC)
+        row = {"id": uuid4(), "user_id": test_user.id, "title": "t", "body": None}
+        await notes_import._copy_batch(
+            Connection(), [{**row, "created_at": now, "updated_at": now}]
+        )
+        assert copied["columns"] == ["id", "user_id", "title", "body", "created_at", "updated_at"]
+        assert copied["records"] == [(row["id"], test_user.id, "t", None, now, now)]
+
+    async def test_import_csv(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        body = 'title,body\r\nPlain,text\r\n"Quoted, title","line one\nline two"\r\nOnly title,\r\nbad\r\n'
+        response = await client.post(
+            "/notes/import", content=body.encode(), headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 3
+        assert data["errors"] == [{"line": 6, "error": "Expected 2 fields, got 1"}]
+
+        notes = {n["title"]: n["body"] for n in (await client.get("/notes")).json()["items"]}
+        assert notes == {
+            "Plain": "text",
+            "Quoted, title": "line one\nline two",
+            "Only title": None,
+        }
+
+    async def test_unsupported_content_type(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        response = await client.post("/notes/import", json=[{"title": "x"}])
+        assert response.status_code == 415
+
+    async def test_invalid_utf8_rolls_back(self, client: AsyncClient, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        response = await client.post(
+            "/notes/import",
+            content=b'{"title": "ok"}\n\xff\xfe\n',
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 400
+        assert (await client.get("/notes")).json()["items"] == []
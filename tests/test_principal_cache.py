@@ -0,0 +1,96 @@
+from uuid import uuid4
+
+from httpx import AsyncClient
+
+from app.auth import cache
+from app.auth.cache import CachedUserDatabase, PrincipalCache, principal_cache
+from app.models.user import User
+
+
+def make_user(**kwargs) -> User:
+    return User(id=uuid4(), email=f"{uuid4().hex}@example.com", hashed_password="fake", **kwargs)
+
+
+class TestPrincipalCache:
+    def test_miss_then_hit(self):
+        cache_ = PrincipalCache(max_size=10, ttl_seconds=60)
+        user = make_user(role="admin")
+        assert cache_.get(user.id) is None
+        cache_.set(user)
+
+        cached = cache_.get(user.id)
+        assert cached is not None
+        assert cached is not user
+        assert cached.id == user.id
+        assert cached.role == "admin"
+        assert cache_.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    def test_lru_eviction(self):
+        cache_ = PrincipalCache(max_size=2, ttl_seconds=60)
+        first, second, third = make_user(), make_user(), make_user()
+        cache_.set(first)
+        cache_.set(second)
+        cache_.get(first.id)  # first becomes most recently used
+        cache_.set(third)
+
+        assert cache_.get(second.id) is None
+        assert cache_.get(first.id) is not None
+        assert cache_.get(third.id) is not None
+        assert cache_.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(cache, "monotonic", lambda: now[0])
+        cache_ = PrincipalCache(max_size=10, ttl_seconds=30)
+        user = make_user()
+        cache_.set(user)
+
+        now[0] += 29
+        assert cache_.get(user.id) is not None
+        now[0] += 2
+        assert cache_.get(user.id) is None
+        assert cache_.stats()["size"] == 0
+
+    def test_disabled(self):
+        cache_ = PrincipalCache(max_size=10, ttl_seconds=0)
+        user = make_user()
+        cache_.set(user)
+        assert cache_.get(user.id) is None
+
+
+class TestCachedUserDatabase:
+    async def test_get_served_from_cache(self, session):
+        user = make_user()
+        session.add(user)
+        await session.commit()
+
+        user_db = CachedUserDatabase(session, User)
+        hits = principal_cache.hits
+        assert (await user_db.get(user.id)).email == user.email
+        assert principal_cache.hits == hits
+        assert (await user_db.get(user.id)).email == user.email
+        assert principal_cache.hits == hits + 1
+
+    async def test_update_invalidates(self, session):
+        user = make_user()
+        session.add(user)
+        await session.commit()
+
+        user_db = CachedUserDatabase(session, User)
+        cached = await user_db.get(user.id)
+        await user_db.update(cached, {"is_active": False})
+
+        assert principal_cache.get(user.id) is None
+        assert (await user_db.get(user.id)).is_active is False
+
+    async def test_role_update_invalidates(self, admin_client: AsyncClient, session):
+        target = make_user()
+        session.add(target)
+        await session.commit()
+        principal_cache.set(target)
+
+        response = await admin_client.patch(
+            f"/admin/users/{target.id}/role", json={"role": "admin"}
+        )
+        assert response.status_code == 200
+        assert principal_cache.get(target.id) is None
@@ -0,0 +1,78 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app import profiling
+from app.auth import current_active_user
+from app.main import app
+from app.models.user import User
+from app.profiling import QueryProfilerMiddleware, install_query_profiler, remove_query_profiler
+from tests.conftest import async_session_maker, engine
+
+
+class RecordingLogger:
+    def __init__(self) -> None:
+        self.warnings: list[tuple[str, dict]] = []
+
+    def warning(self, event: str, **kwargs) -> None:
+        self.warnings.append((event, kwargs))
+
+
+@pytest.fixture
+def profiler():
+    install_query_profiler(engine)
+    yield
+    remove_query_profiler(engine)
+
+
+@pytest.fixture
+def warnings(monkeypatch) -> RecordingLogger:
+    recorder = RecordingLogger()
+    monkeypatch.setattr(profiling, "logger", recorder)
+    return recorder
+
+
+def profiled_client(asgi_app, threshold: int = 10) -> AsyncClient:
+    wrapped = QueryProfilerMiddleware(asgi_app, repeat_threshold=threshold)
+    return AsyncClient(transport=ASGITransport(app=wrapped), base_url="http://test")
+
+
+def repeated_select_app(times: int) -> FastAPI:
+    demo = FastAPI()
+
+    @demo.get("/loop")
+    async def loop():
+        async with async_session_maker() as session:
+            for i in range(times):
+                await session.execute(text("SELECT :n"), {"n": i})
+        return {"ok": True}
+
+    return demo
+
+
+class TestQueryProfiler:
+    async def test_server_timing_counts_request_queries(self, profiler, test_user: User):
+        app.dependency_overrides[current_active_user] = lambda: test_user
+        async with profiled_client(app) as client:
+            response = await client.post("/notes", json={"title": "Profiled"})
+        assert response.status_code == 201
+        assert response.headers["server-timing"].startswith("db;dur=")
+        assert response.headers["server-timing"].endswith('desc="1 queries"')
+
+    async def test_warns_on_repeated_statement(self, profiler, warnings):
+        async with profiled_client(repeated_select_app(4), threshold=3) as client:
+            response = await client.get("/loop")
+        assert 'desc="4 queries"' in response.headers["server-timing"]
+        [(event, details)] = warnings.warnings
+        assert event == "query_profiler.repeated_statement"
+        assert details["count"] == 4
+        assert details["statement"] == "SELECT ?"
+
+    async def test_no_warning_under_threshold(self, profiler, warnings):
+        async with profiled_client(repeated_select_app(3), threshold=3) as client:
+            await client.get("/loop")
+        assert warnings.warnings == []
+
+    async def test_disabled_by_default(self):
+        assert not any(m.cls is QueryProfilerMiddleware for m in app.user_middleware)
@@ -0,0 +1,115 @@
+from collections.abc import AsyncGenerator
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app import database
+from app.auth import current_active_user
+from app.auth.backend import jwt_strategy
+from app.auth.cache import principal_cache
+from app.database import Base, ReplicaSet
+from app.main import app
+from app.models.note import Note
+from app.models.user import User
+
+
+@pytest.fixture
+async def replicas(tmp_path, monkeypatch) -> AsyncGenerator[ReplicaSet, None]:
+    """Two read replicas, each a separate SQLite database that is never written to by the app."""
+    replica_set = ReplicaSet(
+        [f"sqlite+aiosqlite:///{tmp_path / f'replica{i}.db'}" for i in range(2)]
+    )
+    for replica in replica_set.engines:
+        async with replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(database, "replicas", replica_set)
+    yield replica_set
+    for replica in replica_set.engines:
+        await replica.dispose()
+
+
+async def seed_replicas(replica_set: ReplicaSet, *rows) -> None:
+    for _ in replica_set.engines:
+        async with replica_set.session() as session:
+            session.add_all([row.__class__(**row_values(row)) for row in rows])
+            await session.commit()
+
+
+def row_values(row) -> dict:
+    return {
+        c.key: getattr(row, c.key) for c in row.__table__.columns if getattr(row, c.key) is not None
+    }
+
+
+class TestReplicaRouting:
+    async def test_round_robin(self, replicas: ReplicaSet):
+        binds = []
+        for _ in range(4):
+            async with replicas.session() as session:
+                binds.append(session.bind)
+        assert binds == [*replicas.engines, *replicas.engines]
+
+    async def test_reads_use_replica(self, auth_client: AsyncClient, test_user: User, replicas):
+        note = Note(id=uuid4(), title="Only on the replica", user_id=test_user.id)
+        await seed_replicas(replicas, note)
+
+        response = await auth_client.get("/notes")
+        assert [item["title"] for item in response.json()["items"]] == ["Only on the replica"]
+        assert (await auth_client.get(f"/notes/{note.id}")).status_code == 200
+
+    async def test_reads_follow_writes_to_primary(
+        self, auth_client: AsyncClient, test_user: User, replicas
+    ):
+        await seed_replicas(replicas, Note(title="Replica", user_id=test_user.id))
+
+        response = await auth_client.post("/notes", json={"title": "Primary"})
+        assert response.status_code == 201
+        assert "app_primary" in response.cookies
+
+        response = await auth_client.get("/notes")
+        assert [item["title"] for item in response.json()["items"]] == ["Primary"]
+
+        auth_client.cookies.clear()
+        response = await auth_client.get("/notes")
+        assert [item["title"] for item in response.json()["items"]] == ["Replica"]
+
+    async def test_expired_stickiness_uses_replica(
+        self, auth_client: AsyncClient, test_user: User, replicas
+    ):
+        await seed_replicas(replicas, Note(title="Replica", user_id=test_user.id))
+        response = await auth_client.get("/notes", headers={"Cookie": "app_primary=1.0"})
+        assert [item["title"] for item in response.json()["items"]] == ["Replica"]
+
+    async def test_failed_write_is_not_sticky(self, auth_client: AsyncClient, replicas):
+        response = await auth_client.post("/notes", json={"title": ""})
+        assert response.status_code == 422
+        assert "app_primary" not in response.cookies
+
+    async def test_current_user_ignores_lagging_replica(
+        self, client: AsyncClient, session, replicas
+    ):
+        app.dependency_overrides.pop(current_active_user, None)
+        user = User(id=uuid4(), email="demoted@example.com", hashed_password="fake", role="admin")
+        await seed_replicas(replicas, user)  # the replica still has the admin role
+        session.add(User(**{**row_values(user), "role": "user"}))  # demoted on the primary
+        await session.commit()
+        token = await jwt_strategy(False).write_token(user)
+        cookie = {"Cookie": f"app_access={token}"}
+
+        response = await client.get("/auth/me", headers=cookie)
+        assert response.status_code == 200
+        assert response.json()["role"] == "user"
+        assert principal_cache.get(user.id).role == "user"
+
+        response = await client.patch(
+            f"/admin/users/{uuid4()}/role", json={"role": "admin"}, headers=cookie
+        )
+        assert response.status_code == 403
+
+
+class TestWithoutReplicas:
+    async def test_writes_set_no_cookie(self, auth_client: AsyncClient):
+        response = await auth_client.post("/notes", json={"title": "Primary"})
+        assert response.status_code == 201
+        assert "app_primary" not in response.cookies
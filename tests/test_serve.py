@@ -0,0 +1,182 @@
+import pickle
+
+import pytest
+
+from app import serve
+from app.config import Settings, settings
+from app.serve import (
+    available_cpus,
+    build_config,
+    cgroup_cpu_limit,
+    clear_metrics_dir,
+    plan,
+    split_pool,
+    worker_environment,
+)
+
+
+class TestCpuLimit:
+    def test_cgroup_v2_quota(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("150000 100000\n")
+        assert cgroup_cpu_limit(tmp_path) == 1.5
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert cgroup_cpu_limit(tmp_path) is None
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+        assert cgroup_cpu_limit(tmp_path) == 2.0
+
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+        assert cgroup_cpu_limit(tmp_path) is None
+
+    def test_no_cgroup(self, tmp_path):
+        assert cgroup_cpu_limit(tmp_path) is None
+
+    def test_quota_caps_available_cpus(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("50000 100000\n")
+        assert available_cpus(tmp_path) == 1
+
+
+class TestPlan:
+    def test_split_pool_keeps_ratio_within_budget(self):
+        assert split_pool(100, 4, pool_size=5, max_overflow=10) == (8, 17)
+        assert split_pool(9, 2, pool_size=5, max_overflow=10) == (1, 3)
+        assert split_pool(2, 8, pool_size=5, max_overflow=10) == (1, 0)
+
+    def test_workers_follow_cpus_unless_set(self):
+        assert plan(Settings(), cpus=6).workers == 6
+        assert plan(Settings(serve_workers=2), cpus=6).workers == 2
+
+    def test_pool_is_divided_across_workers(self):
+        settings = Settings(db_max_connections=60, db_pool_size=5, db_max_overflow=10)
+        serve_plan = plan(settings, cpus=4)
+        assert (serve_plan.pool_size, serve_plan.max_overflow) == (5, 10)
+        assert worker_environment(serve_plan) == {"DB_POOL_SIZE": "5", "DB_MAX_OVERFLOW": "10"}
+
+        serve_plan = plan(settings, cpus=12)
+        assert serve_plan.workers * (serve_plan.pool_size + serve_plan.max_overflow) <= 60
+
+    def test_pool_unchanged_without_budget(self):
+        serve_plan = plan(Settings(db_pool_size=7, db_max_overflow=3), cpus=16)
+        assert (serve_plan.pool_size, serve_plan.max_overflow) == (7, 3)
+
+
+class TestBuildConfig:
+    def test_config_follows_plan(self):
+        settings = Settings(serve_port=9000, serve_graceful_timeout_seconds=5)
+        serve_plan = plan(settings, cpus=3)
+        config = build_config(settings, serve_plan)
+        assert (config.workers, config.port, config.loop, config.http) == (
+            3,
+            9000,
+            serve_plan.loop,
+            serve_plan.http,
+        )
+        assert config.factory
+        assert config.limit_max_requests is None
+        assert config.timeout_graceful_shutdown == 5
+        assert not config.access_log
+
+    def test_each_worker_draws_its_own_limit(self):
+        settings = Settings(serve_max_requests=1000)
+        config = build_config(settings, plan(settings, cpus=1))
+        config.app = "tests.test_serve:asgi_app"
+        config.factory = False
+        config.load()
+        assert config.limit_max_requests == 1000
+
+        settings = Settings(serve_max_requests=1000, serve_max_requests_jitter=50)
+        config = build_config(settings, plan(settings, cpus=4))
+        config.app = "tests.test_serve:asgi_app"
+        config.factory = False
+        limits = set()
+        for _ in range(20):
+            # Workers are spawned, so each loads its own copy of the config.
+            worker = pickle.loads(pickle.dumps(config))
+            worker.load()
+            limits.add(worker.limit_max_requests)
+        assert config.limit_max_requests == 1000
+        assert len(limits) > 1
+        assert all(1000 <= limit <= 1050 for limit in limits)
+
+
+async def asgi_app(scope, receive, send):  # pragma: no cover - only loaded, never called
+    pass
+
+
+class TestMain:
+    @pytest.fixture(autouse=True)
+    def serve_settings(self, monkeypatch):
+        for name, value in {
+            "serve_host": "127.0.0.1",
+            "serve_port": 0,
+            "serve_workers": 1,
+            "serve_max_requests": 0,
+            "serve_preload": False,
+            "metrics_multiproc_dir": "",
+            "db_max_connections": 0,
+        }.items():
+            monkeypatch.setattr(settings, name, value)
+        monkeypatch.setattr(serve, "setup_logging", lambda settings: None)
+        for name in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW"):
+            monkeypatch.delenv(name, raising=False)
+
+    def test_single_worker_runs_server(self, monkeypatch):
+        runs = []
+
+        class FakeServer:
+            def __init__(self, config):
+                self.config, self.started = config, False
+
+            def run(self, sockets=None):
+                runs.append(self.config)
+
+        monkeypatch.setattr(serve.uvicorn, "Server", FakeServer)
+        assert serve.main() == serve.STARTUP_FAILURE
+        assert [config.workers for config in runs] == [1]
+
+    @pytest.mark.parametrize("takes_target", [True, False])
+    def test_supervises_workers(self, monkeypatch, takes_target):
+        monkeypatch.setattr(settings, "serve_workers", 3)
+        monkeypatch.setattr(settings, "serve_max_requests", 100)
+        supervisors = []
+
+        class FakeMultiprocess:
+            def __init__(self, config, sockets, **kwargs):
+                self.config, self.sockets, self.kwargs = config, sockets, kwargs
+                supervisors.append(self)
+
+            def run(self):
+                for sock in self.sockets:
+                    sock.close()
+
+        if takes_target:
+            # The locked uvicorn release requires the worker target.
+            def init(self, config, target, sockets):
+                FakeMultiprocess.__init__(self, config, sockets, target=target)
+
+            multiprocess = type("Multiprocess", (FakeMultiprocess,), {"__init__": init})
+        else:
+            multiprocess = FakeMultiprocess
+        monkeypatch.setattr(serve, "Multiprocess", multiprocess)
+
+        assert serve.main() == 0
+        [supervisor] = supervisors
+        assert supervisor.config.workers == 3
+        assert supervisor.config.limit_max_requests == 100
+        assert ("target" in supervisor.kwargs) == takes_target
+        if takes_target:
+            assert supervisor.kwargs["target"].__self__.config is supervisor.config
+
+
+def test_clear_metrics_dir(tmp_path):
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    (directory / "123.json").write_text("{}")
+    (directory / "keep.txt").write_text("")
+    clear_metrics_dir(str(directory))
+    assert [p.name for p in directory.iterdir()] == ["keep.txt"]
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import Decision
+from opentelemetry.trace import SpanKind, StatusCode
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.telemetry import build_exporters, build_sampler, instrument_engine
+
+
+@pytest.fixture
+def spans() -> InMemorySpanExporter:
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer_provider(spans) -> TracerProvider:
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(spans))
+    return provider
+
+
+@pytest.fixture
+def metric_reader() -> InMemoryMetricReader:
+    return InMemoryMetricReader()
+
+
+@pytest.fixture
+async def engine(tmp_path, tracer_provider, metric_reader):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'otel.db'}")
+    instrument_engine(engine, tracer_provider, MeterProvider(metric_readers=[metric_reader]))
+    yield engine
+    await engine.dispose()
+
+
+def metric_points(reader: InMemoryMetricReader) -> dict[str, list]:
+    points = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points[metric.name] = list(metric.data.data_points)
+    return points
+
+
+class TestEngineInstrumentation:
+    async def test_statement_spans_are_children_of_current_span(
+        self, engine, tracer_provider, spans
+    ):
+        tracer = tracer_provider.get_tracer("test")
+        with tracer.start_as_current_span("request") as parent:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        [statement] = [s for s in spans.get_finished_spans() if s.name == "SELECT"]
+        assert statement.kind == SpanKind.CLIENT
+        assert statement.parent.span_id == parent.get_span_context().span_id
+        assert statement.attributes["db.system"] == "sqlite"
+        assert statement.attributes["db.statement"] == "SELECT 1"
+
+    async def test_failed_statement_marks_span_and_counts(self, engine, spans, metric_reader):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(Exception, match="no such table"):
+                await conn.execute(text("SELECT * FROM missing"))
+
+        failed = spans.get_finished_spans()[-1]
+        assert failed.status.status_code == StatusCode.ERROR
+
+        points = metric_points(metric_reader)
+        calls = {p.attributes.get("error.type"): p.value for p in points["db.client.calls"]}
+        assert calls == {None: 1, "OperationalError": 1}
+        assert sum(p.count for p in points["db.client.operation.duration"]) == 2
+
+
+class TestSampler:
+    def test_ratio_applies_to_root_spans(self):
+        never = build_sampler(0.0).should_sample(None, 2**64, "request")
+        always = build_sampler(1.0).should_sample(None, 2**64, "request")
+        assert never.decision == Decision.DROP
+        assert always.decision == Decision.RECORD_AND_SAMPLE
+
+
+class TestExporters:
+    def test_file_exporter_writes_json_lines(self, tmp_path):
+        path = tmp_path / "otel.jsonl"
+        span_exporter, _ = build_exporters("file", str(path))
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        with provider.get_tracer("test").start_as_current_span("work"):
+            pass
+        [line] = path.read_text().splitlines()
+        assert json.loads(line)["name"] == "work"
+
+    def test_unknown_exporter_rejected(self):
+        with pytest.raises(ValueError, match="OTEL_EXPORTER"):
+            build_exporters("zipkin")